@@ -1,47 +1,60 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Blueprint, Response, current_app, request, jsonify, g, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import text, insert, select, func
+from sqlalchemy.exc import IntegrityError
 from flask_cors import CORS
 from datetime import datetime, timedelta
-import json
+import click
+import hmac
+import ipaddress
+import zlib
+import os
+import time
+import uuid
 import jwt
 from functools import wraps
-from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
+from sqlalchemy.orm import make_transient_to_detached
 import logging
 from logstash_formatter import LogstashFormatterV1
-import logstash 
 
+from principal_cache import PrincipalCache
+from hashing import HashingService, HashingBusyError, hash_rounds
+from interest_catalog import InterestCatalog
+from recommendation_index import RecommendationIndex
+from snapshot_index import IndexNotReadyError
+from supplement_search import SupplementSearchIndex
+from log_shipping import AsyncLogstashHandler
+from log_sampling import LogSampler
+from db_pool import build_engine_options, configure_engine, pool_stats
+from db_routing import ReplicaRouter, RoutingSession
+from metrics import RequestMetrics
+from bulk_users import group_export_lines, parse_import_line
+from batch import apply_set_cookies, cookie_header, dispatch as dispatch_subrequest, overrides_auth, parse_batch
+from popularity import PopularityCounters, add_deltas, age_band
+from rate_limit import RateLimiter
+from token_denylist import TokenDenylist
+from json_provider import OrjsonProvider
+from compression import Compressor
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # 읽기 요청의 SELECT 는 복제본으로
+migrate = Migrate()
+hashing = HashingService()
+principal_cache = PrincipalCache()
+token_denylist = TokenDenylist()
+rate_limiter = RateLimiter()
+compressor = Compressor()
+replica_router = ReplicaRouter()
+request_metrics = RequestMetrics()
+log_sampler = LogSampler()
+api = Blueprint('api', __name__)
 
-app = Flask(__name__)
-CORS(app, supports_credentials=True, origins=['http://localhost:3000'])  # CORS 지원 추가
-
-# 시크릿 키 설정 (실제 환경에서는 안전하게 관리되어야 합니다)
-app.config['SECRET_KEY'] = 'your_secret_key'
-
-# 토큰 만료 시간 설정
-app.config['TOKEN_EXPIRATION'] = timedelta(hours=1)
-
-# MySQL 데이터베이스 연결 설정
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+pymysql://heal_user:heal_password@db:3306/heal_db?charset=utf8mb4'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
-migrate = Migrate(app, db)
-
-
-# Flask JSON 인코더 커스터마이징
-class CustomJSONEncoder(json.JSONEncoder):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.ensure_ascii = False  # JSON 응답에서 한글 깨짐 방지
-
-app.json_encoder = CustomJSONEncoder
 
 # 로깅 설정
 logger = logging.getLogger('flask_app')
 logger.setLevel(logging.INFO)
+logstash_handler = None
 
 # Logstash 핸들러 수정된 포맷터 클래스 정의
 class FixedLogstashFormatterV1(LogstashFormatterV1):
@@ -51,40 +64,54 @@ class FixedLogstashFormatterV1(LogstashFormatterV1):
             return message.encode('utf-8')
         return message
 
-# Logstash Formatter 핸들러 추가(stdout 출력용)
-stream_handler = logging.StreamHandler()  # 로그를 스트림(표준 출력)으로 출력
-stream_handler.setFormatter(LogstashFormatterV1())  # LogstashFormatterV1 사용
-stream_handler.setLevel(logging.INFO)  # 로그 레벨 설정
-logger.addHandler(stream_handler)
 
-# Logstash 핸들러 추가
-# logstash_host = app.config.get('LOGSTASH_HOST', 'logstash')
-# logstash_port = int(app.config.get('LOGSTASH_PORT', 5044))
+# 로그 핸들러 구성 (create_app 에서 호출되므로 gunicorn 워커마다 fork 이후 생성됨)
+def configure_logging(app):
+    global logstash_handler
+
+    # Logstash Formatter 핸들러 추가(stdout 출력용)
+    stream_handler = logging.StreamHandler()  # 로그를 스트림(표준 출력)으로 출력
+    stream_handler.setFormatter(LogstashFormatterV1())  # LogstashFormatterV1 사용
+    stream_handler.setLevel(logging.INFO)  # 로그 레벨 설정
+    logger.handlers = [h for h in logger.handlers if type(h) is not logging.StreamHandler]
+    logger.addHandler(stream_handler)
 
-logstash_host = 'logstash'  # 또는 Logstash 서버의 IP 주소
-logstash_port = 5044
+    # Logstash 핸들러 추가 (요청 스레드는 버퍼에 넣기만 하고 전송은 백그라운드 스레드가 배치로 처리)
+    logstash_host = app.config['LOGSTASH_HOST']  # 또는 Logstash 서버의 IP 주소
+    logstash_port = app.config['LOGSTASH_PORT']
 
-try:
-    logstash_handler = logstash.TCPLogstashHandler(logstash_host, logstash_port, version=1)
-    logstash_handler.setFormatter(FixedLogstashFormatterV1())
-    logstash_handler.setLevel(logging.INFO)  # 로그 레벨 설정
+    try:
+        handler = AsyncLogstashHandler(
+            logstash_host,
+            logstash_port,
+            capacity=app.config['LOG_SHIP_BUFFER_SIZE'],
+            batch_size=app.config['LOG_SHIP_BATCH_SIZE'],
+            flush_interval=app.config['LOG_SHIP_FLUSH_INTERVAL'],
+            overflow_policy=app.config['LOG_SHIP_OVERFLOW_POLICY'],
+            sample_rate=app.config['LOG_SHIP_SAMPLE_RATE'],
+        )
+        handler.setFormatter(FixedLogstashFormatterV1())
+        handler.setLevel(logging.INFO)  # 로그 레벨 설정
 
-    # 중복 방지를 위해 기존 핸들러 제거
-    logger.handlers = [h for h in logger.handlers if not isinstance(h, logstash.TCPLogstashHandler)]
-    logger.addHandler(logstash_handler)
+        # 중복 방지를 위해 기존 핸들러 제거
+        for old in [h for h in logger.handlers if isinstance(h, AsyncLogstashHandler)]:
+            logger.removeHandler(old)
+            old.close()
+        logger.addHandler(handler)
+        logstash_handler = handler
 
-    # Logstash 핸들러 초기화 확인 로그
-    logger.info("Flask app started with Logstash handler")
-    logger.debug(f"Logstash handler initialized with host={logstash_host}, port={logstash_port}")
+        # Logstash 핸들러 초기화 확인 로그
+        logger.info("Flask app started with Logstash handler")
+        logger.debug(f"Logstash handler initialized with host={logstash_host}, port={logstash_port}")
 
-except Exception as e:
-    logger.error(f"Failed to initialize Logstash handler: {e}")
+    except Exception as e:
+        logger.error(f"Failed to initialize Logstash handler: {e}")
 
-# Werkzeug Logger 수정
-flask_logger = logging.getLogger('werkzeug')
-flask_logger.handlers = [h for h in flask_logger.handlers if not isinstance(h, logstash.TCPLogstashHandler)]
-flask_logger.addHandler(stream_handler)  # stdout만 기록
-flask_logger.setLevel(logging.INFO)
+    # Werkzeug Logger 수정
+    flask_logger = logging.getLogger('werkzeug')
+    flask_logger.handlers = [h for h in flask_logger.handlers if not isinstance(h, (AsyncLogstashHandler, logging.StreamHandler))]
+    flask_logger.addHandler(stream_handler)  # stdout만 기록
+    flask_logger.setLevel(logging.INFO)
 
 # # Flask의 기본 로거에도 Logstash 핸들러 추가
 # flask_logger = logging.getLogger('werkzeug')
@@ -124,9 +151,12 @@ flask_logger.setLevel(logging.INFO)
 
 
 # 데이터베이스 모델 정의
+# SQLite(로컬 벤치마크/테스트)는 INTEGER PRIMARY KEY 만 자동 증가하므로 PK 타입을 방언별로 지정
+BigIntegerPK = db.BigInteger().with_variant(db.Integer(), 'sqlite')
+
 class User(db.Model):
     __tablename__ = 'user'
-    user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    user_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
     username = db.Column(db.String(50), unique=True, nullable=False)  # 추가: 유저네임 필드
     password = db.Column(db.String(255), nullable=False)  # 추가: 비밀번호 해싱된 값 저장
     name = db.Column(db.String(20), nullable=False)
@@ -137,50 +167,371 @@ class User(db.Model):
 
 class Interest(db.Model):
     __tablename__ = 'interests'
-    interests_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    interests_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
     category = db.Column(db.String(255), nullable=False)
 
 class UserInterest(db.Model):
     __tablename__ = 'user_interests'
-    user_interest_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # (user_id, interests_id) 복합 유니크 인덱스: 중복 방지 및 사용자별 조회/삭제를 인덱스만으로 처리
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'interests_id', name='uq_user_interests_user_interest'),
+    )
+    user_interest_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('user.user_id'), nullable=False)
     interests_id = db.Column(db.BigInteger, db.ForeignKey('interests.interests_id'), nullable=False)
 
-# 인증 데코레이터
-def token_required(f):
+    # 연관 데이터는 핸들러에서 직접 삭제하므로 부모 삭제 시 자식 행을 다시 로드하지 않음(passive_deletes)
+    user = db.relationship('User', backref=db.backref('user_interests', passive_deletes=True))
+    interest = db.relationship('Interest', backref=db.backref('user_interests', passive_deletes=True))
+
+# 관심분야 인기도 요약 (관심분야, 성별, 출생 연도) 별 사용자 수, 나이대는 조회 시점에 계산
+class InterestPopularity(db.Model):
+    __tablename__ = 'interest_popularity'
+    interests_id = db.Column(db.BigInteger, db.ForeignKey('interests.interests_id', ondelete='CASCADE'), primary_key=True)
+    gender = db.Column(db.Enum('male', 'female'), primary_key=True)
+    birth_year = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+
+class Supplement(db.Model):
+    __tablename__ = 'supplements'
+    supplements_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
+    supplement_name = db.Column(db.String(50), nullable=False)
+    supplement_description = db.Column(db.Text)
+
+class SupplementInterest(db.Model):
+    __tablename__ = 'supplement_interests'
+    __table_args__ = (
+        db.UniqueConstraint('supplements_id', 'interests_id'),
+    )
+    supplement_interest_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
+    supplements_id = db.Column(db.BigInteger, db.ForeignKey('supplements.supplements_id', ondelete='CASCADE'), nullable=False)
+    interests_id = db.Column(db.BigInteger, db.ForeignKey('interests.interests_id', ondelete='CASCADE'), nullable=False)
+
+# 토큰 폐기 기록 (모든 워커/서버가 공유, 각 워커가 주기적으로 읽어 메모리 폐기 목록에 반영)
+# jti 가 있으면 그 토큰만, 없으면 user_id 의 cutoff(unix 초) 이전에 발급된 토큰 전체를 폐기. expires_at 이 지나면 삭제
+# 탈퇴한 사용자의 기록도 남아야 하므로 user 에 외래 키를 걸지 않음
+class TokenRevocation(db.Model):
+    __tablename__ = 'token_revocations'
+    revocation_id = db.Column(BigIntegerPK, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(32))
+    user_id = db.Column(db.BigInteger)
+    cutoff = db.Column(db.Double)
+    expires_at = db.Column(db.Double, nullable=False, index=True)
+    created_at = db.Column(db.Double, nullable=False, index=True)
+
+# 관심분야 카탈로그 스냅샷 (GET /interests 와 관심분야 ID 검증에서 공용으로 사용)
+def load_interest_rows():
+    return db.session.query(Interest.interests_id, Interest.category).order_by(Interest.interests_id).all()
+
+interest_catalog = InterestCatalog(loader=load_interest_rows)
+
+# 관심분야 인기도 요약 테이블과 재집계용 GROUP BY
+def load_popularity_rows():
+    return db.session.query(
+        InterestPopularity.interests_id, InterestPopularity.gender,
+        InterestPopularity.birth_year, InterestPopularity.user_count,
+    ).all()
+
+def aggregate_popularity_rows():
+    birth_year = func.extract('year', User.birth_date)
+    return (
+        db.session.query(UserInterest.interests_id, User.gender, birth_year, func.count())
+        .join(User, User.user_id == UserInterest.user_id)
+        .group_by(UserInterest.interests_id, User.gender, birth_year)
+        .all()
+    )
+
+popularity = PopularityCounters(model=InterestPopularity, loader=load_popularity_rows, aggregator=aggregate_popularity_rows)
+
+def load_supplement_rows():
+    return db.session.query(
+        Supplement.supplements_id, Supplement.supplement_name, Supplement.supplement_description
+    ).all()
+
+# 관심분야 -> 영양제 추천 역색인 (GET /users/me/recommendations 와 검색의 관심분야 필터에서 사용)
+def load_recommendation_rows():
+    mappings = db.session.query(SupplementInterest.supplements_id, SupplementInterest.interests_id).all()
+    return load_supplement_rows(), mappings
+
+recommendation_index = RecommendationIndex(loader=load_recommendation_rows)
+
+# 영양제 이름/설명 n-gram 검색 색인 (GET /supplements/search 에서 사용)
+supplement_search = SupplementSearchIndex(loader=load_supplement_rows)
+
+
+# 캐시된 사용자 스냅샷을 현재 세션에 SELECT 없이 붙이거나, 없으면 DB에서 조회 후 캐시
+def load_principal(user_id):
+    snapshot = principal_cache.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = User.query.get(user_id)
+    if user is not None:
+        cache_principal(user)
+    return user
+
+
+# 캐시된 스냅샷에는 비밀번호 해시를 넣지 않음 (비밀번호 확인은 항상 DB 의 현재 값으로)
+def cache_principal(user):
+    principal_cache.set(user.user_id, {c.key: getattr(user, c.key) for c in User.__table__.columns if c.key != 'password'})
+
+
+# 다른 워커/서버에서 바뀐(정보 수정, 비밀번호 변경, 탈퇴) 사용자의 캐시 스냅샷 삭제
+# 바꾼 워커는 커밋 직후 자기 캐시를 고치고, 나머지 워커는 토큰 폐기 목록 동기화(token_revocations) 때 이 함수로 지움
+def invalidate_principals(user_ids):
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+
+
+# 쓰기 API 의 현재 사용자: 캐시 스냅샷(load=False 로 붙인 객체) 대신 DB 의 현재 행을 다시 읽음
+# 다른 워커의 캐시는 동기화 주기만큼 늦게 지워지므로 그 사이 탈퇴한 사용자가 남아 있을 수 있음, 행이 없으면 캐시에서 지우고 None
+def reload_principal(user_id):
+    user = db.session.get(User, user_id, populate_existing=True)
+    if user is None:
+        principal_cache.invalidate(user_id)
+    return user
+
+
+def principal_gone_response(user_id):
+    logger.warning('사용자를 찾을 수 없습니다.', extra={'user_id': user_id})
+    return jsonify({'error': '사용자를 찾을 수 없습니다.'}), 401
+
+
+# GET /users/me 의 약한 ETag: user_id 와 modified_date 로 만들고,
+# modified_date(TIMESTAMP)는 초 단위라 같은 초 안의 수정도 구분되도록 프로필 필드의 CRC 를 덧붙임
+def user_etag(user):
+    profile = f'{user.name}\x00{user.gender}\x00{user.birth_date}'.encode('utf-8')
+    return f'{user.user_id}-{user.modified_date:%Y%m%d%H%M%S}-{zlib.crc32(profile):08x}'
+
+
+# 관심분야 ID 목록 정규화: 정수만 허용하고 중복은 처음 순서대로 하나로 합침
+def normalize_interest_ids(interest_ids):
+    if not isinstance(interest_ids, list):
+        raise ValueError('interests는 리스트여야 합니다.')
+    for interest_id in interest_ids:
+        if isinstance(interest_id, bool) or not isinstance(interest_id, int):
+            raise ValueError(f'interests_id {interest_id}는 정수여야 합니다.')
+    return list(dict.fromkeys(interest_ids))
+
+
+# 존재하지 않는 관심분야 ID 목록
+# 카탈로그 스냅샷으로 먼저 확인하고, 스냅샷에 없는 ID만 DB에서 한 번의 IN 조회로 재확인
+def find_missing_interest_ids(interest_ids):
+    if not interest_ids:
+        return []
+    known_ids = interest_catalog.snapshot().ids
+    unknown = [interest_id for interest_id in interest_ids if interest_id not in known_ids]
+    if not unknown:
+        return []
+
+    found = {
+        row.interests_id
+        for row in db.session.query(Interest.interests_id).filter(Interest.interests_id.in_(unknown))
+    }
+    if found:
+        # 스냅샷 이후 추가된 관심분야가 있으므로 다음 조회 때 다시 읽음
+        interest_catalog.mark_stale()
+    return [interest_id for interest_id in unknown if interest_id not in found]
+
+
+# 사용자의 관심분야를 주어진 목록으로 교체: 현재 목록과 비교해 빠진 행만 삭제하고 새 행만 일괄 추가
+def replace_user_interests(user_id, interest_ids, current_ids=None):
+    if current_ids is None:
+        current_ids = {
+            row.interests_id
+            for row in db.session.query(UserInterest.interests_id).filter(UserInterest.user_id == user_id)
+        }
+    wanted = set(interest_ids)
+    removed = current_ids - wanted
+    added = [interest_id for interest_id in interest_ids if interest_id not in current_ids]
+
+    if removed:
+        UserInterest.query.filter(
+            UserInterest.user_id == user_id,
+            UserInterest.interests_id.in_(removed),
+        ).delete(synchronize_session=False)
+    if added:
+        db.session.execute(
+            insert(UserInterest),
+            [{'user_id': user_id, 'interests_id': interest_id} for interest_id in added],
+        )
+    return added, removed
+
+
+# 잠시 뒤 다시 시도하면 되는 오류(해싱 풀 포화, 색인 미구성 등)의 503 + Retry-After 응답 (e.retry_after 초)
+def retry_later_response(e):
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
+# 관리자 API 인증 데코레이터 (X-Admin-Token 헤더, ADMIN_TOKEN 이 설정되지 않으면 비활성화)
+def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            logger.warning('관리자 API 호출 거부: ADMIN_TOKEN 미설정')
+            return jsonify({'error': '관리자 API가 비활성화되어 있습니다.'}), 403
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+            logger.warning('관리자 API 호출 거부: 잘못된 토큰', extra={'path': request.path})
+            return jsonify({'error': '관리자 인증에 실패했습니다.'}), 401
+        return f(*args, **kwargs)
+    return decorated
+
 
-        # 쿠키에서 토큰 가져오기
-        token = request.cookies.get('token')
+# 메트릭 수집 인증 데코레이터 (METRICS_TOKEN Bearer 토큰 또는 METRICS_ALLOWED_NETWORKS 대역, 둘 다 없으면 비활성화)
+def metrics_access_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = current_app.config.get('METRICS_TOKEN')
+        networks = current_app.config.get('METRICS_ALLOWED_NETWORKS') or []
+        if not expected and not networks:
+            logger.warning('메트릭 API 호출 거부: METRICS_TOKEN/METRICS_ALLOWED_NETWORKS 미설정')
+            return jsonify({'error': '메트릭 API가 비활성화되어 있습니다.'}), 403
+        if expected:
+            scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() == 'bearer' and hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+                return f(*args, **kwargs)
+        if networks and request.remote_addr:
+            try:
+                address = ipaddress.ip_address(request.remote_addr)
+            except ValueError:
+                address = None
+            if address is not None and any(address in network for network in networks):
+                return f(*args, **kwargs)
+        logger.warning('메트릭 API 호출 거부', extra={'remote_addr': request.remote_addr})
+        return jsonify({'error': '메트릭 API 인증에 실패했습니다.'}), 401
+    return decorated
 
-        # # 헤더에서 토큰 가져오기
-        # if 'Authorization' in request.headers:
-        #     token = request.headers['Authorization'].split(" ")[1]  # "Bearer <token>"
 
-        if not token:
-            logger.warning('토큰이 제공되지 않았습니다.')
-            return jsonify({'error': '토큰이 제공되지 않았습니다.'}), 401
+# 가져오기 배치 하나를 검증 후 일괄 INSERT 하고 커밋
+# batch: (줄 번호, user 컬럼 dict, 관심분야 ID 목록) 목록, 반환: (가져온 사용자 수, 거부된 행 목록)
+def import_user_batch(batch):
+    rejected = []
+    unique = []
+    seen = set()
+    for line_no, user, interests in batch:
+        if user['username'] in seen:
+            rejected.append({'line': line_no, 'username': user['username'], 'error': '같은 요청에 중복된 사용자명입니다.'})
+            continue
+        seen.add(user['username'])
+        unique.append((line_no, user, interests))
+
+    # 기존 사용자명과 관심분야 ID는 배치마다 한 번씩만 조회
+    existing = {row.username for row in db.session.query(User.username).filter(User.username.in_(seen))}
+    missing = set(find_missing_interest_ids(list({i for _, _, interests in unique for i in interests})))
+
+    accepted = []
+    for line_no, user, interests in unique:
+        if user['username'] in existing:
+            rejected.append({'line': line_no, 'username': user['username'], 'error': '이미 존재하는 사용자명입니다.'})
+        elif missing.intersection(interests):
+            interest_id = next(i for i in interests if i in missing)
+            rejected.append({'line': line_no, 'username': user['username'], 'error': f'interests_id {interest_id}가 존재하지 않습니다.'})
+        else:
+            accepted.append((user, interests))
+    if not accepted:
+        return 0, rejected
+
+    db.session.execute(insert(User), [user for user, _ in accepted])
+    # MySQL 은 INSERT ... RETURNING 이 없으므로 발급된 user_id 를 사용자명으로 한 번에 조회
+    user_ids = dict(
+        db.session.query(User.username, User.user_id).filter(User.username.in_([user['username'] for user, _ in accepted]))
+    )
+    interest_rows = [
+        {'user_id': user_ids[user['username']], 'interests_id': interest_id}
+        for user, interests in accepted
+        for interest_id in interests
+    ]
+    if interest_rows:
+        db.session.execute(insert(UserInterest), interest_rows)
+    deltas = {}
+    for user, interests in accepted:
+        add_deltas(deltas, user['gender'], user['birth_date'], interests, 1)
+    popularity.record(db.session, deltas)
+    db.session.commit()
+    return len(accepted), rejected
+
+
+# 로그인 토큰 발급 (jti: 토큰 폐기용 ID, iat: 비밀번호 변경/탈퇴 이전 토큰 일괄 폐기용 발급 시각)
+def issue_token(user_id):
+    return jwt.encode({
+        'user_id': user_id,
+        'jti': uuid.uuid4().hex,
+        'iat': time.time(),
+        'exp': datetime.utcnow() + current_app.config['TOKEN_EXPIRATION']
+    }, current_app.config['SECRET_KEY'], algorithm="HS256")
+
+
+def set_token_cookie(response, token):
+    response.set_cookie(
+        'token',  # 쿠키 이름
+        token,    # 쿠키 값
+        httponly=False,
+        secure=False,  # HTTPS 환경에서는 True로 설정
+        samesite='Lax',  # CSRF 방지를 위해 설정
+        max_age=int(current_app.config['TOKEN_EXPIRATION'].total_seconds())
+    )
 
-        try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
-            if not current_user:
-                logger.warning('사용자를 찾을 수 없습니다.', extra={'user_id': data.get('user_id')})
-                return jsonify({'error': '사용자를 찾을 수 없습니다.'}), 401
-            g.user = current_user  # 글로벌 컨텍스트에 사용자 저장
-        except jwt.ExpiredSignatureError:
-            logger.warning('토큰이 만료되었습니다.', extra={'user_id': data.get('user_id') if 'data' in locals() else 'unknown'})
-            return jsonify({'error': '토큰이 만료되었습니다.'}), 401
-        except Exception as e:
-            logger.error(f'유효하지 않은 토큰입니다: {e}')
-            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+# 인증 데코레이터
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # 배치 요청(POST /batch)의 하위 요청은 처음 한 번만 인증하고 결과를 재사용
+        if g.get('_batch'):
+            if '_batch_auth' not in g:
+                g._batch_auth = authenticate()
+            error = g._batch_auth
+        else:
+            error = authenticate()
+        if error is not None:
+            return error
 
         return f(*args, **kwargs)
     return decorated
 
 
+# 쿠키의 토큰으로 사용자를 인증해 g.user 에 저장 (실패하면 오류 응답, 성공하면 None)
+def authenticate():
+    token = None
+
+    # 쿠키에서 토큰 가져오기
+    token = request.cookies.get('token')
+
+    # # 헤더에서 토큰 가져오기
+    # if 'Authorization' in request.headers:
+    #     token = request.headers['Authorization'].split(" ")[1]  # "Bearer <token>"
+
+    if not token:
+        logger.warning('토큰이 제공되지 않았습니다.')
+        return jsonify({'error': '토큰이 제공되지 않았습니다.'}), 401
+
+    try:
+        data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        # 로그아웃/비밀번호 변경/탈퇴로 폐기된 토큰 거부 (DB 조회 전에 확인)
+        if token_denylist.is_revoked(data):
+            logger.warning('폐기된 토큰입니다.', extra={'user_id': data.get('user_id')})
+            return jsonify({'error': '폐기된 토큰입니다.'}), 401
+        current_user = load_principal(data['user_id'])
+        if not current_user:
+            logger.warning('사용자를 찾을 수 없습니다.', extra={'user_id': data.get('user_id')})
+            return jsonify({'error': '사용자를 찾을 수 없습니다.'}), 401
+        g.user = current_user  # 글로벌 컨텍스트에 사용자 저장
+        g.token_claims = data  # 로그아웃 등에서 토큰 폐기에 사용
+    except jwt.ExpiredSignatureError:
+        logger.warning('토큰이 만료되었습니다.', extra={'user_id': data.get('user_id') if 'data' in locals() else 'unknown'})
+        return jsonify({'error': '토큰이 만료되었습니다.'}), 401
+    except Exception as e:
+        logger.error(f'유효하지 않은 토큰입니다: {e}')
+        return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+    return None
+
+
 # @app.route('/test-log', methods=['GET'])
 # def test_log():
 #     record = logging.LogRecord(
@@ -195,13 +546,67 @@ def token_required(f):
 #     logstash_handler.emit(record)  # Logstash 핸들러 직접 호출
 #     return jsonify({"message": "Test log sent"}), 200
 
-@app.route('/test-log', methods=['GET'])
+@api.route('/test-log', methods=['GET'])
 def test_log():
     logger.info("This is a test log message from Flask")
     return jsonify({"message": "Test log sent"}), 200
 
+# 내부 캐시/풀 상태 조회 API (운영 모니터링용, 설정/내부 상태가 담기므로 관리자 전용)
+@api.route('/internal/stats', methods=['GET'])
+@admin_required
+def get_internal_stats():
+    return jsonify({
+        'principal_cache': principal_cache.stats(),
+        'token_denylist': token_denylist.stats(),
+        'rate_limit': rate_limiter.stats(),
+        'compression': compressor.stats(),
+        'hashing': hashing.stats(),
+        'interest_catalog': interest_catalog.stats(),
+        'recommendation_index': recommendation_index.stats(),
+        'supplement_search': supplement_search.stats(),
+        'popularity': popularity.stats(),
+        'log_shipping': logstash_handler.stats() if logstash_handler else None,
+        'log_sampling': log_sampler.stats(),
+        'db_pool': pool_stats(db.engine),
+        'db_replicas': replica_router.stats(),
+    }), 200
+
+# Prometheus 메트릭 API (text format, 워커 프로세스별 값, 풀/레플리카/로그 전송 내부 상태가 담기므로 수집기 전용)
+@api.route('/metrics', methods=['GET'])
+@metrics_access_required
+def get_metrics():
+    return Response(request_metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+# 관심분야 카탈로그 즉시 갱신 API (interests 테이블 변경 후 호출, DB 를 다시 읽으므로 관리자 전용)
+@api.route('/internal/interests/refresh', methods=['POST'])
+@admin_required
+def refresh_interest_catalog():
+    try:
+        snapshot = interest_catalog.refresh()
+        logger.info('관심분야 카탈로그 갱신', extra={'size': len(snapshot.items), 'etag': snapshot.etag})
+        return jsonify({'message': '관심분야 카탈로그가 갱신되었습니다.', 'etag': snapshot.etag}), 200
+    except Exception as e:
+        logger.error(f'관심분야 카탈로그 갱신 중 오류 발생: {e}')
+        return jsonify({'error': str(e)}), 500
+
+# 영양제 추천/검색 색인 재구성 요청 API (supplements / supplement_interests 를 일괄 변경한 후 호출)
+# 전체 재구성은 영양제 수에 비례해 오래 걸리므로 관리자 전용이며, 이 워커의 백그라운드 스레드에 맡기고 바로 202 반환
+# (다른 워커는 각자의 재구성 주기에 반영)
+@api.route('/internal/recommendations/refresh', methods=['POST'])
+@admin_required
+def refresh_recommendation_index():
+    recommendation_index.mark_stale()
+    supplement_search.mark_stale()
+    logger.info('영양제 추천/검색 색인 재구성 요청')
+    return jsonify({'message': '영양제 추천/검색 색인 재구성을 요청했습니다.'}), 202
+
+def duplicate_username_response(username):
+    logger.warning('회원가입 실패: 이미 존재하는 사용자명.', extra={'username': username})
+    return jsonify({'error': '이미 존재하는 사용자명입니다.'}), 400
+
+
 # 회원가입 API
-@app.route('/users', methods=['POST'])
+@api.route('/users', methods=['POST'])
 def register_user():
     try :
         data = request.json
@@ -215,16 +620,26 @@ def register_user():
 
         # 사용자명 중복 확인
         if User.query.filter_by(username=username).first():
-            logger.warning('회원가입 실패: 이미 존재하는 사용자명.', extra={'username': username})
-            return jsonify({'error': '이미 존재하는 사용자명입니다.'}), 400
+            return duplicate_username_response(username)
+
+        # 관심분야 리스트 검증 (해싱 전에 한 번의 조회로 확인)
+        try:
+            interests = normalize_interest_ids(data.get('interests', []))  # 없으면 빈 리스트
+        except ValueError as e:
+            logger.warning('회원가입 실패: 잘못된 interests.', extra={'username': username})
+            return jsonify({'error': str(e)}), 400
+        missing = find_missing_interest_ids(interests)
+        if missing:
+            logger.warning('관심분야 추가 실패: 유효하지 않은 interest_id.', extra={'interest_id': missing[0]})
+            return jsonify({'error': f'interests_id {missing[0]}가 존재하지 않습니다.'}), 404
         
         # 비밀번호 해싱
-        hashed_password = bcrypt.generate_password_hash(password)
+        hashed_password = hashing.generate_password_hash(password)
         
         # 사용자 추가
         new_user = User(
             username=username,
-            password=hashed_password.decode('utf-8'),
+            password=hashed_password,
             name=name,
             gender=gender,
             birth_date=birth_date
@@ -233,23 +648,25 @@ def register_user():
         db.session.flush()  # flush()로 user_id를 미리 가져옴
         user_id = new_user.user_id
 
-        # 관심분야 리스트
-        interests = data.get('interests', [])  # 없으면 빈 리스트
-
-        # 관심분야 추가
-        for interest_id in interests:
-            interest = Interest.query.get(interest_id)
-            if not interest:
-                logger.warning('관심분야 추가 실패: 유효하지 않은 interest_id.', extra={'interest_id': interest_id})
-                return jsonify({'error': f'interests_id {interest_id}가 존재하지 않습니다.'}), 404
-
-            user_interest = UserInterest(user_id=new_user.user_id, interests_id=interest_id)
-            db.session.add(user_interest)
+        # 관심분야 일괄 추가 (신규 사용자이므로 기존 관심분야 없음)
+        replace_user_interests(user_id, interests, current_ids=set())
+        popularity.record(db.session, add_deltas({}, gender, birth_date, interests, 1))
 
         db.session.commit()
 
         logger.info('회원가입 성공', extra={'user_id': user_id, 'username': username})
         return jsonify({'message': '회원가입이 완료되었습니다!', 'user_id': new_user.user_id})
+    except IntegrityError as e:
+        db.session.rollback()
+        # 같은 사용자명으로 동시에 가입해 중복 확인을 함께 통과한 경우: 유니크 제약 위반을 중복 확인과 같은 응답으로
+        if User.query.filter_by(username=username).first():
+            return duplicate_username_response(username)
+        logger.error(f'회원가입 중 오류 발생: {e}', extra={'username': username})
+        return jsonify({'error': str(e)}), 500
+    except HashingBusyError as e:
+        db.session.rollback()
+        logger.warning('회원가입 지연: 해싱 풀 포화.', extra={'username': data.get('username') if 'data' in locals() else 'unknown'})
+        return retry_later_response(e)
     except Exception as e:
         db.session.rollback()
         logger.error(f'회원가입 중 오류 발생: {e}', extra={'username': data.get('username') if 'data' in locals() else 'unknown'})
@@ -257,7 +674,8 @@ def register_user():
 
 
 # 로그인 API
-@app.route('/auth/login', methods=['POST'])
+@api.route('/auth/login', methods=['POST'])
+@rate_limiter.limit('login')  # 사용자명/IP별 시도 횟수 제한 (DB 조회, bcrypt 전에 거부)
 def login_user():
     try:
         data = request.json
@@ -271,40 +689,49 @@ def login_user():
             return jsonify({'error': '존재하지 않는 사용자입니다.'}), 404
 
        # 비밀번호 확인
-        if not bcrypt.check_password_hash(user.password, password):
+        if not hashing.check_password_hash(user.password, password):
             logger.warning('로그인 실패: 비밀번호 불일치.', extra={'username': username})
             return jsonify({'error': '비밀번호가 올바르지 않습니다.'}), 401
 
+        # 저장된 해시의 비용이 현재 비용보다 낮으면 다시 해싱해 저장 (실패해도 로그인은 진행)
+        try:
+            new_hash = hashing.rehash_if_needed(user.password, password)
+            if new_hash is not None:
+                old_rounds = hash_rounds(user.password)
+                user.password = new_hash
+                db.session.commit()
+                principal_cache.invalidate(user.user_id)
+                logger.info('비밀번호 해시 비용 갱신', extra={'user_id': user.user_id, 'from_rounds': old_rounds, 'to_rounds': hashing.rounds})
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f'비밀번호 해시 비용 갱신 실패: {e}', extra={'user_id': user.user_id})
+
         # JWT 토큰 생성
-        token = jwt.encode({
-            'user_id': user.user_id,
-            'exp': datetime.utcnow() + app.config['TOKEN_EXPIRATION']
-        }, app.config['SECRET_KEY'], algorithm="HS256")
+        token = issue_token(user.user_id)
 
 
         # 응답 생성
         response = jsonify({'message': '로그인 성공'})
         # 쿠키에 토큰 저장
-        response.set_cookie(
-            'token',  # 쿠키 이름
-            token,    # 쿠키 값
-            httponly=False,
-            secure=False,  # HTTPS 환경에서는 True로 설정
-            samesite='Lax',  # CSRF 방지를 위해 설정
-            max_age=app.config['TOKEN_EXPIRATION'].total_seconds()
-        )
+        set_token_cookie(response, token)
         logger.info('로그인 성공', extra={'username': username, 'user_id': user.user_id})
         return response, 200
         # return jsonify({'message': '로그인 성공', 'token': token}), 200
+    except HashingBusyError as e:
+        logger.warning('로그인 지연: 해싱 풀 포화.', extra={'username': username if 'username' in locals() else 'unknown'})
+        return retry_later_response(e)
     except Exception as e:
         logger.error(f'로그인 중 오류 발생: {e}', extra={'username': username if 'username' in locals() else 'unknown'})
         return jsonify({'error': str(e)}), 500
 
-# 로그아웃 API (클라이언트 측에서 토큰을 삭제하면 되므로 서버에서는 특별한 처리가 필요하지 않을 수 있음)
-@app.route('/auth/logout', methods=['DELETE'])
+# 로그아웃 API (쿠키 삭제와 함께 토큰을 만료 시각까지 폐기해, 탈취된 토큰도 더 이상 쓸 수 없게 함)
+@api.route('/auth/logout', methods=['DELETE'])
 @token_required
 def logout_user():
     try:
+        token_denylist.revoke(g.token_claims)
+        db.session.commit()
+
         # 응답 생성
         response = jsonify({'message': '로그아웃 되었습니다.'})
         # 쿠키 삭제 (만료 시간 과거로 설정)
@@ -313,18 +740,77 @@ def logout_user():
         # # 서버 측에서 특별한 처리를 하지 않음
         # return jsonify({'message': '로그아웃 되었습니다.'}), 200
     except Exception as e:
+        db.session.rollback()
         logger.error(f'로그아웃 중 오류 발생: {e}', extra={'user_id': g.user.user_id if 'g.user' in locals() else 'unknown'})
         return jsonify({'error': str(e)}), 500
 
 
 
 
+# 배치 API: 여러 API 를 한 번의 왕복으로 호출 (예: 앱 시작 시 /users/me, /users/me/interests, /interests)
+# 하위 요청은 같은 앱 컨텍스트와 DB 세션에서 순서대로 실행되고, 토큰 확인과 사용자 조회는 한 번만 수행
+# 결과는 요청 순서대로 status/body/처리 시간(ms) 배열, 하위 응답의 Set-Cookie 는 배치 응답에 그대로 전달
+@api.route('/batch', methods=['POST'])
+def batch_requests():
+    try:
+        items = parse_batch(request.get_json(silent=True), current_app.config['BATCH_MAX_REQUESTS'])
+    except ValueError as e:
+        logger.warning('배치 요청 실패: 잘못된 본문.')
+        return jsonify({'error': str(e)}), 400
+
+    app = current_app._get_current_object()
+    headers = dict(request.headers)
+    cookies = dict(request.cookies)
+    environ_base = {'REMOTE_ADDR': request.remote_addr}
+    results = []
+    set_cookies = []
+    started = time.perf_counter()
+    g._batch = True
+    try:
+        for item in items:
+            # Cookie/Authorization 을 직접 지정한 하위 요청은 그 헤더로 다시 인증하고, 다음 하위 요청은 공통 쿠키로 다시 인증
+            own_auth = overrides_auth(item)
+            if own_auth:
+                g.pop('_batch_auth', None)
+            result, response = dispatch_subrequest(app, item, headers, environ_base)
+            if own_auth:
+                g.pop('_batch_auth', None)
+            results.append(result)
+            if apply_set_cookies(cookies, response):
+                # 토큰이 바뀌었으므로(로그인/로그아웃/비밀번호 변경/탈퇴) 이후 하위 요청은 새 쿠키로 다시 인증
+                set_cookies.extend(response.headers.getlist('Set-Cookie'))
+                headers['Cookie'] = cookie_header(cookies)
+                g.pop('_batch_auth', None)
+    finally:
+        g._batch = False
+    duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    logger.info('배치 요청', extra={
+        'count': len(items),
+        'duration_ms': duration_ms,
+        'slowest': max(results, key=lambda result: result['duration_ms'])['path'],
+    })
+    response = jsonify({'results': results, 'duration_ms': duration_ms})
+    for header in set_cookies:
+        response.headers.add('Set-Cookie', header)
+    return response, 200
+
+
 # 현재 사용자 정보 조회 API
-@app.route('/users/me', methods=['GET'])
+@api.route('/users/me', methods=['GET'])
 @token_required
 def get_current_user():
     try:
         user = g.user
+        etag = user_etag(user)
+
+        # 클라이언트가 같은 버전을 가지고 있으면 본문/로그 없이 304 (사용자 캐시가 있으면 DB 조회도 없음)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
         user_data = {
             'user_id': user.user_id,
             'username': user.username,
@@ -335,19 +821,27 @@ def get_current_user():
             'modified_date': user.modified_date.strftime('%Y-%m-%d %H:%M:%S')
         }
         logger.info('현재 사용자 정보 조회', extra={'user_id': user.user_id, 'username': user.username})
-        return jsonify(user_data), 200
+        response = jsonify(user_data)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response, 200
     except Exception as e:
         logger.error(f'현재 사용자 정보 조회 중 오류 발생: {e}', extra={'user_id': g.user.user_id if 'g.user' in locals() else 'unknown'})
         return jsonify({'error': str(e)}), 500
 
 
 # 현재 사용자 정보 수정 API
-@app.route('/users/me', methods=['PUT'])
+@api.route('/users/me', methods=['PUT'])
 @token_required
 def update_current_user():
+    user_id, username = g.user.user_id, g.user.username
     try:
         data = request.json
-        user = g.user
+        user = reload_principal(user_id)
+        if user is None:
+            return principal_gone_response(user_id)
+
+        old_gender, old_birth_year = user.gender, user.birth_date.year
 
         # 업데이트 가능한 필드
         user.name = data.get('name', user.name)
@@ -356,77 +850,119 @@ def update_current_user():
         if birth_date:
             user.birth_date = datetime.strptime(birth_date, '%Y-%m-%d')
 
+        # 성별/출생 연도가 바뀌면 인기도 집계에서 사용자의 관심분야를 옮김
+        if (user.gender, user.birth_date.year) != (old_gender, old_birth_year):
+            interest_ids = [
+                row.interests_id
+                for row in db.session.query(UserInterest.interests_id).filter(UserInterest.user_id == user.user_id)
+            ]
+            deltas = {}
+            for interests_id in interest_ids:
+                deltas[(interests_id, old_gender, old_birth_year)] = -1
+            add_deltas(deltas, user.gender, user.birth_date, interest_ids, 1)
+            popularity.record(db.session, deltas)
+
+        # 다른 워커/서버의 캐시 스냅샷도 지워지도록 변경 기록을 함께 커밋
+        token_denylist.record_user_change(user_id, current_app.config['PRINCIPAL_CACHE_TTL'])
         db.session.commit()
+        # 커밋 후 DB 에 저장된 값(modified_date 포함)으로 캐시를 갱신하고 새 ETag 를 돌려줌
+        cache_principal(user)
 
         logger.info('현재 사용자 정보 수정', extra={'user_id': user.user_id, 'username': user.username})
-        return jsonify({'message': '사용자 정보가 업데이트되었습니다.'}), 200
+        response = jsonify({'message': '사용자 정보가 업데이트되었습니다.'})
+        response.set_etag(user_etag(user), weak=True)
+        return response, 200
     except Exception as e:
         db.session.rollback()
-        logger.error(f'현재 사용자 정보 수정 중 오류 발생: {e}', extra={'user_id': user.user_id, 'username': user.username})
+        logger.error(f'현재 사용자 정보 수정 중 오류 발생: {e}', extra={'user_id': user_id, 'username': username})
         return jsonify({'error': str(e)}), 500
 
 
 
 # 비밀번호 변경 API
-@app.route('/users/me/password', methods=['PUT'])
+@api.route('/users/me/password', methods=['PUT'])
 @token_required
+@rate_limiter.limit('change_password')
 def change_password():
+    user_id, username = g.user.user_id, g.user.username
     try:
         data = request.json
-        user = g.user
+        user = reload_principal(user_id)  # 비밀번호 해시는 캐시에 없으므로 DB 의 현재 값으로 확인
+        if user is None:
+            return principal_gone_response(user_id)
 
         current_password = data['current_password']
         new_password = data['new_password']
 
         # 현재 비밀번호 확인
-        if not bcrypt.check_password_hash(user.password, current_password):
+        if not hashing.check_password_hash(user.password, current_password):
             logger.warning('비밀번호 변경 실패: 현재 비밀번호 불일치.', extra={'user_id': user.user_id, 'username': user.username})
             return jsonify({'error': '현재 비밀번호가 올바르지 않습니다.'}), 401
 
         # 새로운 비밀번호 해싱 및 저장
-        hashed_password = bcrypt.generate_password_hash(new_password)
+        hashed_password = hashing.generate_password_hash(new_password)
         user.password = hashed_password
 
+        # 이전에 발급된 토큰(다른 기기 포함)을 모두 폐기하고(비밀번호 변경과 같은 트랜잭션), 현재 클라이언트에는 새 토큰 발급
+        token_denylist.revoke_user(user_id, current_app.config['TOKEN_EXPIRATION'])
         db.session.commit()
+        principal_cache.invalidate(user_id)
+
+        response = jsonify({'message': '비밀번호가 변경되었습니다.'})
+        set_token_cookie(response, issue_token(user_id))
 
-        logger.info('비밀번호 변경 성공', extra={'user_id': user.user_id, 'username': user.username})
-        return jsonify({'message': '비밀번호가 변경되었습니다.'}), 200
+        logger.info('비밀번호 변경 성공', extra={'user_id': user_id, 'username': username})
+        return response, 200
+    except HashingBusyError as e:
+        db.session.rollback()
+        logger.warning('비밀번호 변경 지연: 해싱 풀 포화.', extra={'user_id': user_id, 'username': username})
+        return retry_later_response(e)
     except Exception as e:
         db.session.rollback()
-        logger.error(f'비밀번호 변경 중 오류 발생: {e}', extra={'user_id': user.user_id, 'username': user.username})
+        logger.error(f'비밀번호 변경 중 오류 발생: {e}', extra={'user_id': user_id, 'username': username})
         return jsonify({'error': str(e)}), 500
 
 
 
 # 관심분야 목록 조회 API
-@app.route('/interests', methods=['GET'])
+@api.route('/interests', methods=['GET'])
 def get_all_interests():
     try:
-        interests = Interest.query.all()
-        interests_list = [{'interests_id': i.interests_id, 'category': i.category} for i in interests]
-        logger.info('관심분야 목록 조회')
-        return jsonify({'interests': interests_list}), 200
+        snapshot = interest_catalog.snapshot()
+        etag = f'"{snapshot.etag}"'
+
+        # 클라이언트가 같은 버전을 가지고 있으면 본문 없이 304 (DB 조회 없음)
+        # 압축 응답은 약한 ETag 로 바뀌므로 약한 비교 사용
+        if request.if_none_match.contains_weak(snapshot.etag):
+            response = make_response('', 304)
+        else:
+            response = jsonify({'interests': snapshot.items})
+            logger.info('관심분야 목록 조회')
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = current_app.config['INTEREST_CATALOG_CACHE_CONTROL']
+        return response
     except Exception as e:
         logger.error(f'관심분야 목록 조회 중 오류 발생: {e}')
         return jsonify({'error': str(e)}), 500
 
 
 # 현재 사용자의 관심분야 조회 API
-@app.route('/users/me/interests', methods=['GET'])
+@api.route('/users/me/interests', methods=['GET'])
 @token_required
 def get_user_interests():
     try:
         user = g.user
-        user_interests = UserInterest.query.filter_by(user_id=user.user_id).all()
 
-        interests_list = []
-        for user_interest in user_interests:
-            interest = Interest.query.get(user_interest.interests_id)
-            if interest:
-                interests_list.append({
-                    'interests_id': interest.interests_id,
-                    'category': interest.category
-                })
+        # user_interests ⋈ interests 단일 조회 (관심분야마다 개별 조회하지 않음)
+        rows = (
+            db.session.query(Interest.interests_id, Interest.category)
+            .select_from(UserInterest)
+            .join(UserInterest.interest)
+            .filter(UserInterest.user_id == user.user_id)
+            .order_by(UserInterest.user_interest_id)
+            .all()
+        )
+        interests_list = [{'interests_id': row.interests_id, 'category': row.category} for row in rows]
 
         logger.info('현재 사용자 관심분야 조회', extra={'user_id': user.user_id, 'username': user.username})
         return jsonify({'user_id': user.user_id, 'interests': interests_list}), 200
@@ -435,53 +971,281 @@ def get_user_interests():
         return jsonify({'error': str(e)}), 500
 
 
+# 영양제 검색 API (이름/설명 부분 일치, 초성 검색, 관심분야 필터)
+# 예: /supplements/search?q=비타민&interests_id=1&interests_id=3&limit=20&offset=0
+#     /supplements/search?q=ㅂㅌㅁ  (초성으로만 이루어진 질의는 이름 초성으로 검색, choseong=false 로 끌 수 있음)
+@api.route('/supplements/search', methods=['GET'])
+def search_supplements():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q는 비어있을 수 없습니다.'}), 400
+        if len(query) > current_app.config['SUPPLEMENT_SEARCH_MAX_QUERY_LENGTH']:
+            return jsonify({'error': '검색어가 너무 깁니다.'}), 400
+        try:
+            limit = int(request.args.get('limit', current_app.config['SUPPLEMENT_SEARCH_DEFAULT_LIMIT']))
+            offset = int(request.args.get('offset', 0))
+            interest_ids = [int(value) for value in request.args.getlist('interests_id')]
+        except ValueError:
+            return jsonify({'error': 'limit, offset, interests_id는 정수여야 합니다.'}), 400
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit은 1 이상, offset은 0 이상이어야 합니다.'}), 400
+        limit = min(limit, current_app.config['SUPPLEMENT_SEARCH_MAX_LIMIT'])
+        choseong = {'true': True, 'false': False}.get(request.args.get('choseong', '').lower())
+
+        allowed_ids = recommendation_index.supplement_ids_for(interest_ids) if interest_ids else None
+        results, total = supplement_search.search(
+            query, limit=limit, offset=offset, choseong=choseong, allowed_ids=allowed_ids
+        )
+        return jsonify({'query': query, 'total': total, 'supplements': results}), 200
+    except IndexNotReadyError as e:
+        logger.warning('영양제 검색 지연: 색인 구성 중.')
+        return retry_later_response(e)
+    except Exception as e:
+        logger.error(f'영양제 검색 중 오류 발생: {e}')
+        return jsonify({'error': str(e)}), 500
+
+
+# 사용자 내보내기 API (관리자): 사용자 1명당 한 줄의 NDJSON 을 스트리밍
+# 서버 측 커서(stream_results)로 yield_per 행씩 읽으므로 사용자 수와 관계없이 메모리 사용량이 일정함
+@api.route('/admin/users/export', methods=['GET'])
+@admin_required
+def export_users():
+    stmt = (
+        select(
+            User.user_id, User.username, User.password, User.name, User.gender,
+            User.birth_date, User.created_date, User.modified_date, UserInterest.interests_id,
+        )
+        .outerjoin(UserInterest, UserInterest.user_id == User.user_id)
+        .order_by(User.user_id, UserInterest.user_interest_id)
+    )
+    yield_per = current_app.config['ADMIN_EXPORT_YIELD_PER']
+
+    def generate():
+        exported = 0
+        try:
+            with (replica_router.read_engine() or db.engine).connect() as conn:  # 복제본이 있으면 복제본에서 읽음
+                rows = conn.execution_options(stream_results=True, yield_per=yield_per).execute(stmt)
+                for line in group_export_lines(rows):
+                    exported += 1
+                    yield line
+            logger.info('사용자 내보내기 완료', extra={'exported': exported})
+        except Exception as e:
+            # 이미 응답 헤더를 보낸 뒤이므로 마지막 줄로 오류를 알림
+            logger.error(f'사용자 내보내기 중 오류 발생: {e}', extra={'exported': exported})
+            yield current_app.json.dumps({'error': str(e), 'exported': exported}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename="users.ndjson"'
+    return response
+
+
+# 사용자 가져오기 API (관리자): 내보내기와 같은 형식의 NDJSON 본문을 한 줄씩 읽어 batch_size 명씩 저장
+# 비밀번호는 이미 해싱된 bcrypt 값만 받으며(해싱 없음), 배치마다 커밋하고 거부된 행은 보고서로 반환
+@api.route('/admin/users/import', methods=['POST'])
+@admin_required
+def import_users():
+    try:
+        batch_size = int(request.args.get('batch_size', current_app.config['ADMIN_IMPORT_BATCH_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'batch_size는 정수여야 합니다.'}), 400
+    batch_size = max(1, min(batch_size, current_app.config['ADMIN_IMPORT_MAX_BATCH_SIZE']))
+    max_reported = current_app.config['ADMIN_IMPORT_MAX_REPORTED_REJECTS']
+
+    report = {'imported': 0, 'rejected_count': 0, 'batches': 0, 'failed_batches': 0, 'rejected': []}
+
+    def reject(rows):
+        report['rejected_count'] += len(rows)
+        room = max_reported - len(report['rejected'])
+        if room > 0:
+            report['rejected'].extend(rows[:room])
+
+    def flush(batch):
+        report['batches'] += 1
+        try:
+            imported, rejected = import_user_batch(batch)
+        except Exception as e:
+            # 배치 단위로 커밋하므로 실패한 배치만 되돌리고 다음 배치는 계속 진행
+            db.session.rollback()
+            report['failed_batches'] += 1
+            logger.error(f'사용자 가져오기 배치 실패: {e}', extra={'batch': report['batches']})
+            rejected = [{'line': line_no, 'username': user['username'], 'error': f'배치 저장 실패: {e}'} for line_no, user, _ in batch]
+            imported = 0
+        report['imported'] += imported
+        reject(rejected)
+
+    batch = []
+    for line_no, raw in enumerate(request.stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            user, interests = parse_import_line(raw)
+        except ValueError as e:
+            reject([{'line': line_no, 'error': str(e)}])
+            continue
+        batch.append((line_no, user, interests))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    logger.info('사용자 가져오기 완료', extra={k: v for k, v in report.items() if k != 'rejected'})
+    return jsonify(report), 200
+
+
+# 관심분야 인기도 조회 API (관리자): 요약 테이블 미러로 성별/나이대별 사용자 수 집계 (user 테이블 조회 없음)
+# 예: /admin/analytics/interest-popularity?gender=female&age_band=20대
+@api.route('/admin/analytics/interest-popularity', methods=['GET'])
+@admin_required
+def get_interest_popularity():
+    try:
+        gender_filter = request.args.get('gender')
+        band_filter = request.args.get('age_band')
+        categories = {item['interests_id']: item['category'] for item in interest_catalog.snapshot().items}
+
+        today = datetime.utcnow().date()
+        by_interest = {}
+        for (interests_id, gender, birth_year), count in popularity.counts().items():
+            band = age_band(birth_year, today)
+            if (gender_filter and gender != gender_filter) or (band_filter and band != band_filter):
+                continue
+            entry = by_interest.setdefault(interests_id, {
+                'interests_id': interests_id,
+                'category': categories.get(interests_id),
+                'total': 0,
+                'by_gender': {},
+                'by_age_band': {},
+                'by_gender_age_band': {},
+            })
+            entry['total'] += count
+            entry['by_gender'][gender] = entry['by_gender'].get(gender, 0) + count
+            entry['by_age_band'][band] = entry['by_age_band'].get(band, 0) + count
+            bands = entry['by_gender_age_band'].setdefault(gender, {})
+            bands[band] = bands.get(band, 0) + count
+
+        interests = sorted(by_interest.values(), key=lambda entry: (-entry['total'], entry['interests_id']))
+        stats = popularity.stats()
+        return jsonify({'as_of': stats['loaded_at'], 'interests': interests}), 200
+    except Exception as e:
+        logger.error(f'관심분야 인기도 조회 중 오류 발생: {e}')
+        return jsonify({'error': str(e)}), 500
+
+
+# 관심분야 인기도 재집계 API (관리자): 처음부터 다시 집계해 요약 테이블과의 차이를 보고하고 교체
+@api.route('/admin/analytics/interest-popularity/reconcile', methods=['POST'])
+@admin_required
+def reconcile_interest_popularity():
+    try:
+        report = popularity.reconcile(db.session)
+        logger.info('관심분야 인기도 재집계', extra={'drift_count': report['drift_count'], 'rows': report['rows']})
+        return jsonify(report), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'관심분야 인기도 재집계 중 오류 발생: {e}')
+        return jsonify({'error': str(e)}), 500
+
+
+# 현재 사용자 맞춤 영양제 추천 API
+# 사용자의 관심분야를 많이 포함하는 영양제 순으로 정렬 (관심분야 -> 영양제 역색인 사용, 영양제 테이블 조인 없음)
+@api.route('/users/me/recommendations', methods=['GET'])
+@token_required
+def get_user_recommendations():
+    try:
+        user = g.user
+        try:
+            limit = int(request.args.get('limit', current_app.config['RECOMMENDATION_DEFAULT_LIMIT']))
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit과 offset은 정수여야 합니다.'}), 400
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit은 1 이상, offset은 0 이상이어야 합니다.'}), 400
+        limit = min(limit, current_app.config['RECOMMENDATION_MAX_LIMIT'])
+
+        interest_ids = [
+            row.interests_id
+            for row in db.session.query(UserInterest.interests_id)
+            .filter(UserInterest.user_id == user.user_id)
+            .order_by(UserInterest.user_interest_id)
+        ]
+        recommendations, total = recommendation_index.recommend(interest_ids, limit=limit, offset=offset)
+
+        logger.info('영양제 추천 조회', extra={'user_id': user.user_id, 'username': user.username, 'count': len(recommendations)})
+        return jsonify({
+            'user_id': user.user_id,
+            'interests': interest_ids,
+            'total': total,
+            'recommendations': recommendations,
+        }), 200
+    except IndexNotReadyError as e:
+        logger.warning('영양제 추천 지연: 색인 구성 중.', extra={'user_id': user.user_id})
+        return retry_later_response(e)
+    except Exception as e:
+        logger.error(f'영양제 추천 조회 중 오류 발생: {e}', extra={'user_id': user.user_id, 'username': user.username})
+        return jsonify({'error': str(e)}), 500
+
+
 # 관심분야 추가 API
-@app.route('/users/me/interests', methods=['POST'])
+@api.route('/users/me/interests', methods=['POST'])
 @token_required
 def add_user_interests():
+    user_id, username = g.user.user_id, g.user.username
     try:
         data = request.json
-        user = g.user
+        user = reload_principal(user_id)
+        if user is None:
+            return principal_gone_response(user_id)
         new_interests = data.get('interests', [])  # 새 관심분야 ID 리스트
 
         # 입력 데이터 검증
         if not new_interests:
             logger.warning('관심분야 추가 실패: interests가 비어있습니다.', extra={'user_id': user.user_id, 'username': user.username})
             return jsonify({'error': 'interests는 비어있을 수 없습니다.'}), 400
-        if not isinstance(new_interests, list):
-            logger.warning('관심분야 추가 실패: interests가 리스트가 아닙니다.', extra={'user_id': user.user_id, 'username': user.username})
-            return jsonify({'error': 'interests는 리스트여야 합니다.'}), 400
-
-        # 기존 관심분야 삭제
-        UserInterest.query.filter_by(user_id=user.user_id).delete()
-
-        # 관심 분야 ID가 유효한지 확인 후 추가
-        for interest_id in new_interests:
-            interest = Interest.query.get(interest_id)
-            if not interest:
-                logger.warning('관심분야 추가 실패: 유효하지 않은 interest_id.', extra={'interest_id': interest_id, 'user_id': user.user_id, 'username': user.username})
-                return jsonify({'error': f'interests_id {interest_id}가 존재하지 않습니다.'}), 404
-
-            # 관심분야 추가
-            user_interest = UserInterest(user_id=user.user_id, interests_id=interest_id)
-            db.session.add(user_interest)
-
-        db.session.commit()
-        logger.info('관심분야 추가 성공', extra={'user_id': user.user_id, 'username': user.username})
+        try:
+            new_interests = normalize_interest_ids(new_interests)
+        except ValueError as e:
+            logger.warning('관심분야 추가 실패: 잘못된 interests.', extra={'user_id': user.user_id, 'username': user.username})
+            return jsonify({'error': str(e)}), 400
+
+        # 관심 분야 ID가 유효한지 한 번에 확인
+        missing = find_missing_interest_ids(new_interests)
+        if missing:
+            logger.warning('관심분야 추가 실패: 유효하지 않은 interest_id.', extra={'interest_id': missing[0], 'user_id': user.user_id, 'username': user.username})
+            return jsonify({'error': f'interests_id {missing[0]}가 존재하지 않습니다.'}), 404
+
+        # 현재 관심분야와 비교해 변경된 행만 삭제/추가
+        # 같은 사용자의 동시 요청이 같은 행을 먼저 추가해 유니크 제약에 걸리면, 커밋된 목록과 다시 비교해 한 번 더 시도
+        for attempt in range(2):
+            try:
+                added, removed = replace_user_interests(user_id, new_interests)
+                deltas = add_deltas({}, user.gender, user.birth_date, added, 1)
+                popularity.record(db.session, add_deltas(deltas, user.gender, user.birth_date, removed, -1))
+                db.session.commit()
+                break
+            except IntegrityError as e:
+                db.session.rollback()
+                if attempt:
+                    logger.warning(f'관심분야 추가 실패: 동시 변경 충돌: {e}', extra={'user_id': user_id, 'username': username})
+                    return jsonify({'error': '다른 요청과 관심분야 변경이 충돌했습니다. 다시 시도해주세요.'}), 409
+
+        logger.info('관심분야 추가 성공', extra={'user_id': user.user_id, 'username': user.username, 'added': len(added), 'removed': len(removed)})
         return jsonify({'message': '관심분야가 업데이트되었습니다!'}), 201
 
     except Exception as e:
         db.session.rollback()
-        logger.error(f'관심분야 추가 중 오류 발생: {e}', extra={'user_id': user.user_id, 'username': user.username})
+        logger.error(f'관심분야 추가 중 오류 발생: {e}', extra={'user_id': user_id, 'username': username})
         return jsonify({'error': str(e)}), 500
 
 
 # 관심분야 삭제 API
-@app.route('/users/me/interests/<int:interest_id>', methods=['DELETE'])
+@api.route('/users/me/interests/<int:interest_id>', methods=['DELETE'])
 @token_required
 def delete_user_interest(interest_id):
+    user_id, username = g.user.user_id, g.user.username
     try:
-        user = g.user
+        user = reload_principal(user_id)
+        if user is None:
+            return principal_gone_response(user_id)
 
         user_interest = UserInterest.query.filter_by(user_id=user.user_id, interests_id=interest_id).first()
         if not user_interest:
@@ -489,57 +1253,354 @@ def delete_user_interest(interest_id):
             return jsonify({'error': '해당 관심분야가 존재하지 않습니다.'}), 404
 
         db.session.delete(user_interest)
+        popularity.record(db.session, add_deltas({}, user.gender, user.birth_date, [interest_id], -1))
         db.session.commit()
         logger.info('관심분야 삭제 성공', extra={'interest_id': interest_id, 'user_id': user.user_id, 'username': user.username})
         return jsonify({'message': '관심분야가 삭제되었습니다.'}), 200
     except Exception as e:
         db.session.rollback()
-        logger.error(f'관심분야 삭제 중 오류 발생: {e}', extra={'interest_id': interest_id, 'user_id': user.user_id, 'username': user.username})
+        logger.error(f'관심분야 삭제 중 오류 발생: {e}', extra={'interest_id': interest_id, 'user_id': user_id, 'username': username})
         return jsonify({'error': str(e)}), 500
 
 # 회원 탈퇴 API
-@app.route('/users/me', methods=['DELETE'])
+@api.route('/users/me', methods=['DELETE'])
 @token_required
 def delete_current_user():
+    user_id, username = g.user.user_id, g.user.username
     try:
-        user = g.user
+        user = reload_principal(user_id)
+        if user is None:
+            return principal_gone_response(user_id)
 
-        # 연관 데이터 삭제 (예: user_interests)
+        # 연관 데이터 삭제 (예: user_interests) 및 인기도 집계에서 제외
+        interest_ids = [
+            row.interests_id
+            for row in db.session.query(UserInterest.interests_id).filter(UserInterest.user_id == user.user_id)
+        ]
         UserInterest.query.filter_by(user_id=user.user_id).delete()
+        popularity.record(db.session, add_deltas({}, user.gender, user.birth_date, interest_ids, -1))
 
         # 사용자 계정 삭제
         db.session.delete(user)
+        token_denylist.revoke_user(user_id, current_app.config['TOKEN_EXPIRATION'])
         db.session.commit()
+        principal_cache.invalidate(user_id)
 
         # 응답 생성 및 쿠키 삭제
         response = jsonify({'message': '회원 탈퇴가 완료되었습니다.'})
         response.set_cookie('token', '', expires=0)  # 토큰 쿠키 제거
 
-        logger.info('회원 탈퇴 성공', extra={'user_id': user.user_id, 'username': user.username})
+        logger.info('회원 탈퇴 성공', extra={'user_id': user_id, 'username': username})
         return response, 200
     except Exception as e:
         db.session.rollback()
-        logger.error(f'회원 탈퇴 중 오류 발생: {e}', extra={'user_id': user.user_id, 'username': user.username})
+        logger.error(f'회원 탈퇴 중 오류 발생: {e}', extra={'user_id': user_id, 'username': username})
         return jsonify({'error': str(e)}), 500
 
 
-if __name__ == '__main__':
-    with app.app_context():
-         # MySQL 세션에 utf8mb4 설정 적용
-        db.session.execute(text("SET NAMES 'utf8mb4'"))
-        db.session.execute(text("SET character_set_connection = 'utf8mb4'"))
-        db.session.execute(text("SET character_set_results = 'utf8mb4'"))
-        db.session.execute(text("SET character_set_client = 'utf8mb4'"))
-        db.session.commit()
+# 애플리케이션 팩토리 (gunicorn 워커마다 fork 이후 호출됨)
+def create_app(config=None):
+    app = Flask(__name__)
+    CORS(app, supports_credentials=True, origins=['http://localhost:3000'])  # CORS 지원 추가
+
+    # 시크릿 키 설정 (실제 환경에서는 안전하게 관리되어야 합니다)
+    app.config['SECRET_KEY'] = 'your_secret_key'
+
+    # 토큰 만료 시간 설정
+    app.config['TOKEN_EXPIRATION'] = timedelta(hours=1)
+
+    # MySQL 데이터베이스 연결 설정
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', 'mysql+pymysql://heal_user:heal_password@db:3306/heal_db?charset=utf8mb4'
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # 읽기 전용 복제본 (DATABASE_REPLICA_URLS 에 쉼표로 구분, 비어 있으면 모든 조회를 주 DB 로)
+    # GET/HEAD 요청의 SELECT 만 라운드 로빈으로 복제본에 보내고, 쓰기가 있었던 요청과
+    # 그 뒤 STICKY_SECONDS 동안 같은 클라이언트의 읽기는 주 DB 로 보냄, 상태 확인 주기 초(0이면 사용 안 함)
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [
+        uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()
+    ]
+    app.config['DB_REPLICA_STICKY_SECONDS'] = 5
+    app.config['DB_REPLICA_HEALTH_CHECK_INTERVAL'] = 10
+
+    # 커넥션 풀 설정 (워커당 풀 크기, 초과 허용 수, 재활용 주기 초, pre-ping, 대기/연결/읽기/쓰기 제한 시간 초)
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    app.config['DB_CONNECT_TIMEOUT'] = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+    app.config['DB_READ_TIMEOUT'] = int(os.environ.get('DB_READ_TIMEOUT', 30))
+    app.config['DB_WRITE_TIMEOUT'] = int(os.environ.get('DB_WRITE_TIMEOUT', 30))
+
+    # 토큰 폐기 목록 (블룸 필터 예상 항목 수와 오탐률)
+    # 저장소 database: token_revocations 테이블을 워커/서버가 공유하고 각 워커는 SYNC_INTERVAL 초마다 새 기록을 읽어 반영
+    #   (다른 워커에서 로그아웃/비밀번호 변경한 토큰은 최대 SYNC_INTERVAL 초 뒤부터 거부)
+    # 저장소 memory: 워커 프로세스별 목록이라 워커가 하나일 때만 사용
+    app.config['TOKEN_DENYLIST_ENABLED'] = True
+    app.config['TOKEN_DENYLIST_BACKEND'] = os.environ.get('TOKEN_DENYLIST_BACKEND', 'database')
+    app.config['TOKEN_DENYLIST_SYNC_INTERVAL'] = float(os.environ.get('TOKEN_DENYLIST_SYNC_INTERVAL', 1.0))
+    app.config['TOKEN_DENYLIST_CAPACITY'] = 100000
+    app.config['TOKEN_DENYLIST_ERROR_RATE'] = 0.01
+
+    # token_required 사용자 캐시 설정 (최대 항목 수, TTL 초)
+    # 다른 워커에서 바뀐 사용자의 항목은 토큰 폐기 목록 동기화 때 지워짐 (TOKEN_DENYLIST_SYNC_INTERVAL 초 이내, memory 저장소면 TTL 까지)
+    app.config['PRINCIPAL_CACHE_SIZE'] = 1024
+    app.config['PRINCIPAL_CACHE_TTL'] = 60
+
+    # 라우트별 시도 횟수 제한 (슬라이딩 윈도우, 워커 프로세스별 메모리 저장소)
+    # key: ip(클라이언트 IP) | username(요청 본문 사용자명) | user(인증된 사용자), limit: 허용 횟수, window: 초
+    # RATE_LIMITS 환경변수(JSON)로 바꿀 수 있고, 프록시 뒤에서는 RATE_LIMIT_TRUST_PROXY 로 X-Forwarded-For 사용
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    app.config['RATE_LIMIT_TRUST_PROXY'] = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() in ('1', 'true', 'yes')
+    app.config['RATE_LIMITS'] = os.environ.get('RATE_LIMITS') or {
+        'login': [
+            {'key': 'username', 'limit': 5, 'window': 60},
+            {'key': 'ip', 'limit': 20, 'window': 60},
+        ],
+        'change_password': [
+            {'key': 'user', 'limit': 5, 'window': 300},
+        ],
+    }
+
+    # bcrypt 해싱 프로세스 풀 설정 (워커 수, 대기열 길이, 대기 제한 시간 초, Retry-After 초)
+    # gunicorn 워커마다 풀이 따로 생기므로 GUNICORN_WORKERS 와 함께 조정
+    app.config['HASH_POOL_WORKERS'] = int(os.environ.get('HASH_POOL_WORKERS', 2))
+    app.config['HASH_POOL_QUEUE_DEPTH'] = int(os.environ.get('HASH_POOL_QUEUE_DEPTH', 16))
+    app.config['HASH_POOL_TIMEOUT'] = 10
+    app.config['HASH_POOL_RETRY_AFTER'] = 1
+
+    # bcrypt 비용(log rounds): BCRYPT_LOG_ROUNDS 를 지정하지 않으면 시작 시 해시 1회 시간이
+    # 지연 예산(ms) 이하인 가장 높은 비용(MIN~MAX)으로 보정 (gunicorn 은 마스터에서 한 번 보정해 워커에 전달)
+    # MIN 은 기존 해시의 비용(flask_bcrypt 기본값 12)으로, 보정 결과가 이보다 낮아지지 않음
+    # 저장된 해시의 비용이 현재 비용보다 낮을 때만 로그인 성공 시 현재 비용으로 다시 해싱
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ['BCRYPT_LOG_ROUNDS']) if os.environ.get('BCRYPT_LOG_ROUNDS') else None
+    app.config['BCRYPT_LATENCY_BUDGET_MS'] = float(os.environ.get('BCRYPT_LATENCY_BUDGET_MS', 250))
+    app.config['BCRYPT_MIN_ROUNDS'] = int(os.environ.get('BCRYPT_MIN_ROUNDS', 12))
+    app.config['BCRYPT_MAX_ROUNDS'] = int(os.environ.get('BCRYPT_MAX_ROUNDS', 16))
+
+    # 관심분야 카탈로그 스냅샷 갱신 주기(초)와 GET /interests 캐시 헤더
+    app.config['INTEREST_CATALOG_REFRESH_INTERVAL'] = 300
+    app.config['INTEREST_CATALOG_CACHE_CONTROL'] = 'public, max-age=300'
+
+    # 영양제 추천 색인 전체 재구성 주기(초, 백그라운드 스레드)와 추천 개수 기본값/상한
+    app.config['RECOMMENDATION_INDEX_REFRESH_INTERVAL'] = 600
+    app.config['RECOMMENDATION_DEFAULT_LIMIT'] = 20
+    app.config['RECOMMENDATION_MAX_LIMIT'] = 100
+
+    # 영양제 검색 색인 전체 재구성 주기(초, 백그라운드 스레드), 결과 개수 기본값/상한, 검색어 최대 길이
+    app.config['SUPPLEMENT_SEARCH_REFRESH_INTERVAL'] = 1800
+    app.config['SUPPLEMENT_SEARCH_DEFAULT_LIMIT'] = 20
+    app.config['SUPPLEMENT_SEARCH_MAX_LIMIT'] = 100
+    app.config['SUPPLEMENT_SEARCH_MAX_QUERY_LENGTH'] = 50
+
+    # 관심분야 인기도 미러 갱신 주기(초, 다른 워커의 변경 반영)와 백그라운드 재집계 주기(초, 0이면 사용 안 함)
+    app.config['POPULARITY_REFRESH_INTERVAL'] = 30
+    app.config['POPULARITY_RECONCILE_INTERVAL'] = int(os.environ.get('POPULARITY_RECONCILE_INTERVAL', 0))
+
+    # 응답 압축 (Accept-Encoding 협상 br/gzip, 최소 크기 바이트 이상인 JSON/NDJSON 응답만)
+    app.config['COMPRESS_ENABLED'] = True
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_GZIP_LEVEL'] = 6
+    app.config['COMPRESS_BROTLI_QUALITY'] = 4
+
+    # POST /batch 한 번에 보낼 수 있는 하위 요청 수 상한
+    app.config['BATCH_MAX_REQUESTS'] = 20
+
+    # 관리자 API 토큰 (X-Admin-Token, 설정하지 않으면 관리자 API 비활성화)
+    app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+
+    # /metrics 수집 인증 (Prometheus authorization.credentials 로 보내는 Bearer 토큰, 토큰 없이 허용할 CIDR 목록 쉼표 구분)
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['METRICS_ALLOWED_NETWORKS'] = os.environ.get('METRICS_ALLOWED_NETWORKS', '')
+
+    # 사용자 내보내기 커서 fetch 크기, 가져오기 배치 크기 기본값/상한, 보고서에 담을 거부 행 최대 수
+    app.config['ADMIN_EXPORT_YIELD_PER'] = 1000
+    app.config['ADMIN_IMPORT_BATCH_SIZE'] = 500
+    app.config['ADMIN_IMPORT_MAX_BATCH_SIZE'] = 5000
+    app.config['ADMIN_IMPORT_MAX_REPORTED_REJECTS'] = 1000
+
+    # Logstash 비동기 전송 설정 (버퍼 크기, 배치 크기, 전송 주기 초, 버퍼 초과 시 정책 drop_oldest|sample)
+    app.config['LOGSTASH_HOST'] = os.environ.get('LOGSTASH_HOST', 'logstash')
+    app.config['LOGSTASH_PORT'] = int(os.environ.get('LOGSTASH_PORT', 5044))
+    app.config['LOG_SHIP_BUFFER_SIZE'] = int(os.environ.get('LOG_SHIP_BUFFER_SIZE', 10000))
+    app.config['LOG_SHIP_BATCH_SIZE'] = int(os.environ.get('LOG_SHIP_BATCH_SIZE', 200))
+    app.config['LOG_SHIP_FLUSH_INTERVAL'] = float(os.environ.get('LOG_SHIP_FLUSH_INTERVAL', 1.0))
+    app.config['LOG_SHIP_OVERFLOW_POLICY'] = os.environ.get('LOG_SHIP_OVERFLOW_POLICY', 'drop_oldest')
+    app.config['LOG_SHIP_SAMPLE_RATE'] = int(os.environ.get('LOG_SHIP_SAMPLE_RATE', 10))
+
+    # 성공 경로 INFO 로그 샘플링 (LOG_SAMPLING_CONFIG 환경변수(JSON)로 코드 변경 없이 조정)
+    # 로거/라우트(엔드포인트 또는 URL 규칙)/메시지별로 N개 중 1개만 남기고, 버린 로그는 summary_interval 초마다
+    # 라우트/사용자 버킷별 건수 요약 레코드로 기록. WARNING 이상과 slow_ms 이상 걸린 요청의 로그는 항상 남김
+    app.config['LOG_SAMPLING_CONFIG'] = os.environ.get('LOG_SAMPLING_CONFIG') or {
+        'loggers': {'flask_app': {'rate': 1}},
+        'routes': {
+            'api.get_current_user': {'rate': 20},
+            'api.get_user_interests': {'rate': 20},
+            'api.get_all_interests': {'rate': 20},
+        },
+        'always_level': 'WARNING',
+        'slow_ms': 500,
+        'summary_interval': 60,
+        'user_buckets': 16,
+    }
+
+    if config:
+        app.config.update(config)
+
+    # 메트릭 허용 대역은 문자열(환경 변수) 또는 목록으로 받아 ip_network 목록으로 변환
+    networks = app.config['METRICS_ALLOWED_NETWORKS']
+    if isinstance(networks, str):
+        networks = [network.strip() for network in networks.split(',') if network.strip()]
+    app.config['METRICS_ALLOWED_NETWORKS'] = [ipaddress.ip_network(network, strict=False) for network in networks]
+
+    def engine_options(uri):
+        return build_engine_options(
+            uri,
+            pool_size=app.config['DB_POOL_SIZE'],
+            max_overflow=app.config['DB_MAX_OVERFLOW'],
+            pool_recycle=app.config['DB_POOL_RECYCLE'],
+            pool_pre_ping=app.config['DB_POOL_PRE_PING'],
+            pool_timeout=app.config['DB_POOL_TIMEOUT'],
+            connect_timeout=app.config['DB_CONNECT_TIMEOUT'],
+            read_timeout=app.config['DB_READ_TIMEOUT'],
+            write_timeout=app.config['DB_WRITE_TIMEOUT'],
+        )
+
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    # 복제본은 replica_0, replica_1 ... 바인드로 등록 (모델은 바인드를 지정하지 않으므로 테이블 생성/쓰기는 주 DB 에만)
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    for i, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+        binds[f'replica_{i}'] = dict(engine_options(uri), url=uri)
 
-        # MySQL 문자셋 설정 확인
+    # JSON 응답 직렬화 (orjson, 한글 UTF-8 그대로 출력)
+    app.json = OrjsonProvider(app)
+
+    db.init_app(app)
+    with app.app_context():
+        # 풀의 모든 커넥션에 연결 시점 세션 설정(utf8mb4) 적용
+        for engine in db.engines.values():
+            configure_engine(engine)
+    migrate.init_app(app, db)
+    hashing.init_app(app)
+    principal_cache.init_app(app)
+    token_denylist.init_app(app)
+    token_denylist.watch(db.session, TokenRevocation)
+    if invalidate_principals not in token_denylist.listeners:
+        token_denylist.listeners.append(invalidate_principals)
+    replica_router.init_app(app, db)
+    replica_router.watch(db.session)
+    rate_limiter.init_app(app)
+    compressor.init_app(app)
+    interest_catalog.init_app(app)
+    recommendation_index.init_app(app)
+    recommendation_index.watch(db.session, Supplement, SupplementInterest)
+    supplement_search.init_app(app)
+    supplement_search.watch(db.session, Supplement)
+    popularity.init_app(app)
+    popularity.watch(db.session)
+    configure_logging(app)
+    log_sampler.init_app(app)
+    configure_metrics(app)
+
+    app.register_blueprint(api)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(reconcile_popularity_command)
+
+    # 관심분야 카탈로그 스냅샷 로드 (DB가 아직 준비되지 않았으면 첫 요청 때 로드)
+    with app.app_context():
+        try:
+            interest_catalog.refresh()
+        except Exception as e:
+            logger.warning(f'관심분야 카탈로그 초기 로드 실패: {e}')
+        try:
+            popularity.refresh()
+        except Exception as e:
+            logger.warning(f'관심분야 인기도 초기 로드 실패: {e}')
+    token_denylist.start_sync(app)
+    popularity.start_reconciler(app, db.session)
+    # 추천/검색 색인은 시작을 막지 않도록 백그라운드 스레드에서 처음 구성 (구성 전 요청은 503 + Retry-After)
+    recommendation_index.start_refresher(app)
+    supplement_search.start_refresher(app)
+    replica_router.start_health_checker()
+    log_sampler.start_summarizer()
+
+    return app
+
+
+# 요청 계측 훅과 컴포넌트 통계를 /metrics 에 연결
+def configure_metrics(app):
+    request_metrics.init_app(app, db)
+    if request_metrics.observe_bcrypt not in hashing.listeners:
+        hashing.listeners.append(request_metrics.observe_bcrypt)
+
+    registry = request_metrics.registry
+    if registry._stats_sources:
+        return
+    registry.register_stats('heal_principal_cache', principal_cache.stats,
+                            counters=('hits', 'misses', 'evictions'))
+    registry.register_stats('heal_token_denylist', token_denylist.stats,
+                            counters=('checks', 'rejected', 'rebuilds', 'bloom_false_positives', 'syncs', 'sync_errors', 'synced_rows'))
+    registry.register_stats('heal_rate_limit', rate_limiter.stats,
+                            counters=('allowed', 'rejected', 'evictions'))
+    registry.register_stats('heal_compression', compressor.stats,
+                            counters=('compressed', 'skipped_small', 'bytes_in', 'bytes_out'))
+    registry.register_stats('heal_hash_pool', hashing.stats,
+                            counters=('submitted', 'completed', 'rejected', 'rehashed', 'rehash_errors'))
+    registry.register_stats('heal_interest_catalog', interest_catalog.stats,
+                            counters=('refreshes', 'refresh_errors'))
+    registry.register_stats('heal_recommendation_index', recommendation_index.stats,
+                            counters=('rebuilds', 'rebuild_errors', 'incremental_updates'))
+    registry.register_stats('heal_supplement_search', supplement_search.stats,
+                            counters=('rebuilds', 'rebuild_errors', 'incremental_updates', 'queries'))
+    registry.register_stats('heal_popularity', popularity.stats,
+                            counters=('refreshes', 'refresh_errors', 'reconciliations', 'drift_detected'))
+    registry.register_stats('heal_log_shipping', lambda: logstash_handler.stats() if logstash_handler else None,
+                            counters=('enqueued', 'sent', 'dropped', 'batches', 'send_errors', 'connections'))
+    registry.register_stats('heal_log_sampling', log_sampler.stats,
+                            counters=('kept', 'dropped', 'summaries'))
+    registry.register_stats('heal_db_pool', lambda: pool_stats(db.engine),
+                            counters=('checkouts', 'timeouts'))
+    registry.register_stats('heal_db_replicas', replica_router.stats,
+                            counters=('replica_reads', 'primary_reads', 'fallbacks', 'health_checks', 'health_check_failures'))
+
+
+# 1회성 DB 초기화 (배포 시 워커를 띄우기 전에 한 번만 실행: flask --app app init-db)
+def init_db():
+    # MySQL 문자셋 설정 확인 (utf8mb4 세션 설정은 커넥션 생성 시 db_pool.configure_engine 에서 적용)
+    if db.engine.dialect.name == 'mysql':
         print("MySQL 세션의 문자셋 설정:")
         result = db.session.execute(text("SHOW VARIABLES LIKE 'character_set%'")).fetchall()
         for row in result:
             print(row)
 
-        
-        db.create_all()  # 초기 테이블 생성
+    db.create_all()  # 초기 테이블 생성
+
+
+@click.command('init-db')
+def init_db_command():
+    init_db()
+    print("데이터베이스 초기화 완료")
+
+
+# 관심분야 인기도 재집계 (cron 등에서 주기적으로 실행: flask --app app reconcile-popularity)
+@click.command('reconcile-popularity')
+def reconcile_popularity_command():
+    report = popularity.reconcile(db.session)
+    print(f"관심분야 인기도 재집계 완료: {report['rows']}행, 불일치 {report['drift_count']}건 ({report['duration']:.2f}초)")
+    for drift in report['drift']:
+        print(f"  interests_id={drift['interests_id']} gender={drift['gender']} birth_year={drift['birth_year']}: "
+              f"{drift['stored']} -> {drift['actual']}")
+
+
+# 개발 서버 실행 (운영 환경은 gunicorn -c gunicorn.conf.py wsgi:app)
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_db()
 
         # 로깅 설정 디버깅 추가
         print("Configured log handlers for flask_app logger:")
@@ -568,4 +1629,4 @@ if __name__ == '__main__':
         # except Exception as e:
         #     print(f"Logstash handler test failed: {e}")
 
-    app.run(host='0.0.0.0', port=8000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8000)
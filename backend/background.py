@@ -0,0 +1,47 @@
+import contextlib
+import os
+import threading
+
+
+# 워커 프로세스마다 하나씩 도는 백그라운드 데몬 스레드
+# gunicorn 이 fork 한 워커에는 부모 프로세스의 스레드가 없으므로 pid 가 바뀌었으면 다시 시작한다.
+# interval 초(숫자, 또는 다음 실행까지 남은 초를 돌려주는 함수, None 이면 wake 까지 대기)마다 step 을 호출하고,
+# 예외는 on_error 로 넘긴다. app 이 주어지면 step/on_error 를 앱 컨텍스트 안에서 호출한다.
+# 같은 프로세스에서 다시 start 하면 (create_app 재호출) 스레드는 그대로 두고 실행할 작업만 바꾼다.
+class DaemonLoop:
+    def __init__(self, name):
+        self.name = name
+        self._thread = None
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._task = None  # (step, interval, on_error, app)
+
+    @property
+    def running(self):
+        return self._pid == os.getpid() and self._thread is not None
+
+    def start(self, step, interval, on_error, app=None):
+        self._task = (step, interval, on_error, app)
+        if self.running:
+            return
+
+        def run():
+            while True:
+                interval = self._task[1]
+                delay = interval() if callable(interval) else interval
+                self._wakeup.wait(max(delay, 0) if delay is not None else None)
+                self._wakeup.clear()
+                step, _, on_error, app = self._task
+                with app.app_context() if app is not None else contextlib.nullcontext():
+                    try:
+                        step()
+                    except Exception as e:
+                        on_error(e)
+
+        self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self._pid = os.getpid()
+        self._thread.start()
+
+    # 대기 중인 스레드를 깨워 바로 다음 step 실행
+    def wake(self):
+        self._wakeup.set()
@@ -0,0 +1,115 @@
+import logging
+import time
+from http.cookies import SimpleCookie
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+
+ALLOWED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+# 하위 요청에 넘기지 않는 상위 요청 헤더 (본문 관련 헤더는 하위 요청 본문으로 다시 만듦)
+SKIPPED_HEADERS = frozenset(('content-length', 'content-type', 'content-encoding', 'transfer-encoding'))
+# 결과에 담는 하위 응답 헤더
+RESULT_HEADERS = ('ETag', 'Retry-After', 'Cache-Control')
+# 인증에 쓰이는 헤더 (하위 요청이 직접 지정하면 상위 요청의 인증 결과를 재사용하지 않음)
+AUTH_HEADERS = frozenset(('cookie', 'authorization'))
+
+logger = logging.getLogger('flask_app')
+
+
+# POST /batch 본문 검증: {'requests': [{'method': 'GET', 'path': '/users/me', 'body': {...}, 'headers': {...}}, ...]}
+# 잘못된 본문이면 ValueError
+def parse_batch(data, max_requests):
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise ValueError('requests는 리스트여야 합니다.')
+    items = data['requests']
+    if not items:
+        raise ValueError('requests는 비어있을 수 없습니다.')
+    if len(items) > max_requests:
+        raise ValueError(f'한 번에 최대 {max_requests}개까지 요청할 수 있습니다.')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f'requests[{index}]는 객체여야 합니다.')
+        method = str(item.get('method', 'GET')).upper()
+        path = item.get('path')
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f'requests[{index}].method는 {", ".join(ALLOWED_METHODS)} 중 하나여야 합니다.')
+        if not isinstance(path, str) or not path.startswith('/'):
+            raise ValueError(f'requests[{index}].path는 /로 시작하는 문자열이어야 합니다.')
+        if path.split('?', 1)[0].rstrip('/') == '/batch':
+            raise ValueError(f'requests[{index}]에서 /batch 를 다시 호출할 수 없습니다.')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise ValueError(f'requests[{index}].headers는 객체여야 합니다.')
+        parsed.append({'method': method, 'path': path, 'body': item.get('body'), 'headers': headers})
+    return parsed
+
+
+# 현재 앱 컨텍스트(같은 g, 같은 DB 세션) 안에서 하위 요청 하나를 실행하고 결과 dict 반환
+# 요청 훅(before/after_request: 계측, 압축 등)은 상위 POST /batch 에서 한 번만 실행되므로 뷰 함수만 디스패치한다.
+def dispatch(app, item, base_headers, environ_base):
+    headers = {key: value for key, value in base_headers.items() if key.lower() not in SKIPPED_HEADERS}
+    headers.update(item['headers'])
+    builder = EnvironBuilder(
+        path=item['path'],
+        method=item['method'],
+        headers=headers,
+        json=item['body'],
+        environ_base=environ_base,
+    )
+    started = time.perf_counter()
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with app.request_context(environ):
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            # 없는 경로(404), 허용되지 않은 메서드(405) 등
+            response = app.make_response(({'error': e.description}, e.code))
+        except Exception as e:
+            logger.error(f'배치 하위 요청 처리 중 오류 발생: {e}', extra={'method': item['method'], 'path': item['path']})
+            response = app.make_response(({'error': str(e)}, 500))
+        if response.is_json:
+            body = response.get_json(silent=True)
+        else:
+            body = response.get_data(as_text=True) or None
+    duration = time.perf_counter() - started
+
+    result = {
+        'method': item['method'],
+        'path': item['path'],
+        'status': response.status_code,
+        'body': body,
+        'duration_ms': round(duration * 1000, 3),
+    }
+    result_headers = {name: response.headers[name] for name in RESULT_HEADERS if name in response.headers}
+    if result_headers:
+        result['headers'] = result_headers
+    return result, response
+
+
+# 하위 응답의 Set-Cookie(로그인/비밀번호 변경 시 새 토큰, 로그아웃/탈퇴 시 삭제)를 이후 하위 요청의 쿠키에 반영
+# 쿠키가 바뀌었으면 True
+def apply_set_cookies(cookies, response):
+    changed = False
+    for header in response.headers.getlist('Set-Cookie'):
+        for name, morsel in SimpleCookie(header).items():
+            if morsel.value:
+                cookies[name] = morsel.value
+            else:
+                cookies.pop(name, None)
+            changed = True
+    return changed
+
+
+def overrides_auth(item):
+    return any(name.lower() in AUTH_HEADERS for name in item['headers'])
+
+
+def cookie_header(cookies):
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
@@ -0,0 +1,337 @@
+"""HTTP API 부하/지연 벤치마크
+
+로컬 SQLite DB와 로그 수집 스텁으로 앱을 띄우고, 사용자 N명을 시드한 뒤
+회원가입/로그인/인증 조회/관심분야 수정이 섞인 워크로드를 실행한다.
+엔드포인트별 p50/p95/p99 지연, 처리량, 요청당 SQL 구문 수를 출력하고
+기준선(JSON)과 비교해 허용 범위를 넘는 회귀가 있으면 종료 코드 1로 끝난다.
+
+    python benchmarks/bench_api.py --users 200 --requests 2000
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_api.py --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert  # noqa: E402
+
+
+# 워크로드 구성 (엔드포인트 이름, 비중)
+WORKLOAD = [
+    ('signup', 4),
+    ('login', 8),
+    ('get_me', 33),
+    ('get_my_interests', 20),
+    ('get_interests', 20),
+    ('update_interests', 15),
+]
+
+INTEREST_CATEGORIES = [
+    '간 건강', '피로 개선', '눈 건강', '관절/뼈 건강', '면역력 강화',
+    '소화 건강', '수면 개선', '스트레스 관리', '피부 건강', '혈액순환',
+]
+
+PASSWORD = 'bench-password'
+
+
+# 로그 수집 스텁: Logstash 로 보내지 않고 건수만 셈
+class CountingSink(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+# 요청 단위 SQL 구문 수 집계 (스레드별)
+class StatementCounter:
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def build_app(db_path, bcrypt_rounds):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    import app as app_module
+
+    app = app_module.create_app({
+        'SECRET_KEY': 'benchmark-secret-key-0123456789abcdef',
+        'BCRYPT_LOG_ROUNDS': bcrypt_rounds,
+        'HASH_POOL_WORKERS': 0,  # 요청 스레드에서 직접 해싱 (프로세스 풀 기동 비용 제외)
+        'RATE_LIMIT_ENABLED': False,  # 한 IP에서 반복 로그인하므로 시도 횟수 제한 해제
+        'LOGSTASH_HOST': '127.0.0.1',
+        'LOGSTASH_PORT': 9,
+    })
+
+    # 로그 핸들러를 스텁으로 교체
+    sink = CountingSink()
+    for handler in list(app_module.logger.handlers):
+        app_module.logger.removeHandler(handler)
+        handler.close()
+    app_module.logger.addHandler(sink)
+    logging.getLogger('werkzeug').handlers = []
+    return app_module, app, sink
+
+
+def seed(app_module, app, users, rng):
+    db = app_module.db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(app_module.Interest), [{'category': c} for c in INTEREST_CATEGORIES])
+
+        # bcrypt 비용을 줄이기 위해 해시 하나를 모든 시드 사용자에게 재사용
+        password_hash = app_module.hashing.generate_password_hash(PASSWORD)
+        db.session.execute(insert(app_module.User), [
+            {
+                'username': f'bench{i}',
+                'password': password_hash,
+                'name': f'사용자{i}',
+                'gender': rng.choice(['male', 'female']),
+                'birth_date': date(1960 + i % 45, 1 + i % 12, 1 + i % 28),
+            }
+            for i in range(users)
+        ])
+        db.session.flush()
+        user_ids = [row[0] for row in db.session.query(app_module.User.user_id).order_by(app_module.User.user_id)]
+        interest_ids = list(range(1, len(INTEREST_CATEGORIES) + 1))
+        db.session.execute(insert(app_module.UserInterest), [
+            {'user_id': user_id, 'interests_id': interest_id}
+            for user_id in user_ids
+            for interest_id in rng.sample(interest_ids, rng.randint(1, 5))
+        ])
+        db.session.commit()
+        app_module.interest_catalog.refresh()
+        app_module.principal_cache.clear()
+    return interest_ids
+
+
+def login_tokens(client, users):
+    tokens = []
+    for i in range(users):
+        response = client.post('/auth/login', json={'username': f'bench{i}', 'password': PASSWORD})
+        if response.status_code != 200:
+            raise RuntimeError(f'시드 사용자 로그인 실패: {response.status_code} {response.get_data(as_text=True)}')
+        tokens.append(client.get_cookie('token').value)
+    return tokens
+
+
+def make_request(client, name, rng, tokens, interest_ids, signup_seq):
+    if name == 'signup':
+        return client.post('/users', json={
+            'username': f'signup{next(signup_seq)}',
+            'password': PASSWORD,
+            'name': '신규',
+            'gender': rng.choice(['male', 'female']),
+            'birth_date': '1990-05-05',
+            'interests': rng.sample(interest_ids, 3),
+        })
+    if name == 'login':
+        return client.post('/auth/login', json={'username': f'bench{rng.randrange(len(tokens))}', 'password': PASSWORD})
+
+    headers = {'Cookie': f'token={rng.choice(tokens)}'}
+    if name == 'get_me':
+        return client.get('/users/me', headers=headers)
+    if name == 'get_my_interests':
+        return client.get('/users/me/interests', headers=headers)
+    if name == 'get_interests':
+        return client.get('/interests')
+    if name == 'update_interests':
+        return client.post('/users/me/interests', headers=headers,
+                           json={'interests': rng.sample(interest_ids, rng.randint(1, 5))})
+    raise ValueError(name)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app_module, app, sink = build_app(os.path.join(tmpdir, 'bench.db'), args.bcrypt_rounds)
+        interest_ids = seed(app_module, app, args.users, rng)
+
+        counter = StatementCounter()
+        with app.app_context():
+            event.listen(app_module.db.engine, 'before_cursor_execute', counter)
+
+        tokens = login_tokens(app.test_client(use_cookies=True), min(args.users, args.sessions))
+        names = [name for name, _ in WORKLOAD]
+        weights = [weight for _, weight in WORKLOAD]
+        plan = rng.choices(names, weights=weights, k=args.requests)
+
+        signup_seq = itertools.count()  # next() 는 스레드 간에 원자적
+
+        def measure():
+            samples = defaultdict(list)
+            statements = defaultdict(list)
+            errors = defaultdict(int)
+            samples_lock = threading.Lock()
+
+            def worker(chunk, worker_seed):
+                client = app.test_client(use_cookies=False)
+                worker_rng = random.Random(worker_seed)
+                for name in chunk:
+                    counter.reset()
+                    started = time.perf_counter()
+                    response = make_request(client, name, worker_rng, tokens, interest_ids, signup_seq)
+                    elapsed = time.perf_counter() - started
+                    with samples_lock:
+                        samples[name].append(elapsed)
+                        statements[name].append(counter.count)
+                        if response.status_code >= 400:
+                            errors[name] += 1
+
+            chunks = [plan[i::args.concurrency] for i in range(args.concurrency)]
+            wall_started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(worker, chunks, [args.seed + i for i in range(args.concurrency)]))
+            wall_time = time.perf_counter() - wall_started
+
+            results = {}
+            for name in names:
+                values = sorted(samples[name])
+                if not values:
+                    continue
+                results[name] = {
+                    'count': len(values),
+                    'errors': errors[name],
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p95_ms': percentile(values, 95) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    # 이 측정에서 완료된 요청 수 / 측정 전체 경과 시간 (동시 실행 시에도 실제 처리량)
+                    'throughput_rps': len(values) / wall_time,
+                    'sql_per_request': sum(statements[name]) / len(statements[name]),
+                }
+            return results, wall_time
+
+        # 워밍업 (캐시/커넥션 준비) 후 repeat 회 측정해 지표별 중앙값 사용
+        measure()
+        runs = [measure() for _ in range(args.repeat)]
+
+    endpoints = {}
+    for name in names:
+        per_run = [results[name] for results, _ in runs if name in results]
+        if not per_run:
+            continue
+        endpoints[name] = {
+            metric: (sum(r[metric] for r in per_run) if metric in ('count', 'errors')
+                     else statistics.median(r[metric] for r in per_run))
+            for metric in per_run[0]
+        }
+    wall_time = statistics.median(wall for _, wall in runs)
+    return {
+        'meta': {
+            'users': args.users,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'repeat': args.repeat,
+            'bcrypt_rounds': args.bcrypt_rounds,
+            'seed': args.seed,
+            'wall_time_s': wall_time,
+            'throughput_rps': args.requests / wall_time,
+            'log_records': sink.count,
+        },
+        'endpoints': endpoints,
+    }
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"requests={meta['requests']}x{meta['repeat']} concurrency={meta['concurrency']} "
+          f"wall={meta['wall_time_s']:.2f}s throughput={meta['throughput_rps']:.1f} req/s")
+    print(f"{'endpoint':<18}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>9}{'sql/req':>9}")
+    for name, r in report['endpoints'].items():
+        print(f"{name:<18}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['throughput_rps']:>9.1f}{r['sql_per_request']:>9.2f}")
+
+
+# 기준선 대비 회귀 목록
+# 지연: threshold 비율과 min_delta_ms 를 모두 넘으면 회귀 (아주 짧은 요청의 측정 잡음 제외)
+# SQL 구문 수: threshold 비율을 넘으면 회귀
+def compare(report, baseline, threshold, min_delta_ms):
+    regressions = []
+    for name, current in report['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(name)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            limit = max(base[metric] * (1 + threshold), base[metric] + min_delta_ms)
+            if current[metric] > limit:
+                regressions.append(f'{name} {metric}: {base[metric]:.2f} -> {current[metric]:.2f}')
+        if current['sql_per_request'] > base['sql_per_request'] * (1 + threshold) + 1e-9:
+            regressions.append(
+                f"{name} sql_per_request: {base['sql_per_request']:.2f} -> {current['sql_per_request']:.2f}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HEAL API 벤치마크')
+    parser.add_argument('--users', type=int, default=200, help='시드 사용자 수')
+    parser.add_argument('--sessions', type=int, default=50, help='로그인해 둘 사용자 세션 수')
+    parser.add_argument('--requests', type=int, default=2000, help='측정 요청 수')
+    parser.add_argument('--concurrency', type=int, default=1, help='동시 실행 스레드 수')
+    parser.add_argument('--repeat', type=int, default=3, help='측정 반복 횟수 (지표별 중앙값 사용)')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4, help='벤치마크용 bcrypt cost')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='비교할 기준선 JSON 경로')
+    parser.add_argument('--threshold', type=float, default=0.2, help='허용 증가 비율 (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='회귀로 보지 않는 지연 증가 폭(ms)')
+    parser.add_argument('--save-baseline', help='결과를 기준선 JSON 으로 저장할 경로')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'saved {path}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for key in ('users', 'requests', 'concurrency', 'repeat', 'bcrypt_rounds'):
+            if baseline.get('meta', {}).get(key) != report['meta'][key]:
+                print(f"warning: 기준선과 설정이 다릅니다 ({key}: {baseline['meta'].get(key)} != {report['meta'][key]})")
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print('REGRESSION')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'no regression (threshold {args.threshold:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""토큰 폐기 목록(denylist) 확인 비용 마이크로 벤치마크
+
+token_required 의 인증 확인(jwt.decode)만 했을 때와 폐기 목록 확인을 더했을 때의
+1회당 시간을 폐기된 토큰 수별로 비교하고, 블룸 필터 크기와 실제 오탐률,
+블룸 필터 없이 dict 만 확인할 때의 시간을 함께 출력한다.
+
+    python benchmarks/bench_auth.py
+    python benchmarks/bench_auth.py --revoked 0 10000 100000 --iterations 50000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+
+from token_denylist import MemoryDenylist  # noqa: E402
+
+
+SECRET_KEY = 'bench-secret-key-bench-secret-key'
+
+
+def make_token(user_id):
+    return jwt.encode({
+        'user_id': user_id,
+        'jti': uuid.uuid4().hex,
+        'iat': time.time(),
+        'exp': datetime.utcnow() + timedelta(hours=1),
+    }, SECRET_KEY, algorithm='HS256')
+
+
+def time_per_call(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def run(args):
+    tokens = [make_token(i % 1000) for i in range(args.iterations)]
+    claims = [jwt.decode(token, SECRET_KEY, algorithms=['HS256']) for token in tokens]
+
+    decode_us = time_per_call(lambda token: jwt.decode(token, SECRET_KEY, algorithms=['HS256']), tokens)
+    print(f'jwt.decode (기존 token_required 확인): {decode_us:.2f} us/회')
+    print()
+    print(f'{"revoked":>9}{"bloom KB":>10}{"k":>4}{"miss us":>10}{"hit us":>9}{"+decode %":>11}{"fp rate":>10}'
+          f'{"dict us":>9}')
+
+    for revoked in args.revoked:
+        denylist = MemoryDenylist(capacity=args.capacity, error_rate=args.error_rate)
+        exp = time.time() + 3600
+        revoked_jtis = [uuid.uuid4().hex for _ in range(revoked)]
+        for jti in revoked_jtis:
+            denylist.revoke(jti, exp)
+        # 비밀번호 변경 사용자 일부 (cutoff 확인 경로 포함)
+        for user_id in range(10000, 10000 + revoked // 100):
+            denylist.revoke_user(user_id, time.time(), exp)
+
+        miss_us = time_per_call(lambda c: denylist.is_revoked(c['jti'], c['user_id'], c['iat']), claims)
+        hit_claims = [{'jti': jti, 'user_id': 1, 'iat': 0} for jti in revoked_jtis[:len(claims)]]
+        hit_us = time_per_call(lambda c: denylist.is_revoked(c['jti'], c['user_id'], c['iat']), hit_claims) if hit_claims else 0.0
+        assert not any(denylist.is_revoked(c['jti'], c['user_id'], c['iat']) for c in claims)
+
+        # 비교: 블룸 필터 없이 dict 만 확인할 때 (프로세스 내 저장소에서는 이쪽이 더 빠름)
+        plain = dict.fromkeys(revoked_jtis, exp)
+        dict_us = time_per_call(lambda c: plain.get(c['jti']), claims)
+
+        stats = denylist.stats()
+        fp_rate = stats['bloom_false_positives'] / (2 * len(claims))  # 위에서 claims 를 두 번 확인
+        print(f'{revoked:>9}{stats["bloom_bits"] / 8 / 1024:>10.1f}{stats["bloom_hashes"]:>4}{miss_us:>10.2f}'
+              f'{hit_us:>9.2f}{miss_us / decode_us * 100:>10.1f}%{fp_rate:>10.4f}{dict_us:>9.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='토큰 폐기 목록 확인 비용 마이크로 벤치마크')
+    parser.add_argument('--revoked', type=int, nargs='+', default=[0, 1000, 10000, 100000], help='폐기된 토큰 수')
+    parser.add_argument('--iterations', type=int, default=20000, help='확인할 (폐기되지 않은) 토큰 수')
+    parser.add_argument('--capacity', type=int, default=100000, help='블룸 필터 예상 항목 수')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='블룸 필터 목표 오탐률')
+    args = parser.parse_args(argv)
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
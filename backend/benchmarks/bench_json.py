@@ -0,0 +1,136 @@
+"""JSON 직렬화 / 응답 압축 마이크로 벤치마크
+
+대표 응답 페이로드(관심분야 목록, 추천, 검색, 사용자 정보, 인기도 집계)를
+Flask 기본 JSON 프로바이더(표준 json, ensure_ascii)와 OrjsonProvider 로 직렬화해
+jsonify 1회당 시간과 본문 크기를 비교하고, gzip/brotli 압축 후 크기와 압축 시간을 출력한다.
+
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --iterations 20000
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from json_provider import OrjsonProvider  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+CATEGORIES = [
+    '간 건강', '피로 개선', '눈 건강', '관절/뼈 건강', '면역력 강화',
+    '소화 건강', '수면 개선', '스트레스 관리', '피부 건강', '혈액순환',
+]
+
+
+def build_payloads(rng):
+    interests = {'interests': [{'interests_id': i + 1, 'category': c} for i, c in enumerate(CATEGORIES)]}
+    supplement = lambda i: {  # noqa: E731
+        'supplements_id': i,
+        'supplement_name': f'데일리 비타민C 1000 {i}',
+        'supplement_description': '면역력 강화와 피로 개선에 도움을 줄 수 있는 고함량 비타민C 영양제입니다.',
+    }
+    recommendations = {
+        'user_id': 1,
+        'interests': [1, 2, 5],
+        'total': 120,
+        'recommendations': [
+            dict(supplement(i), score=rng.randint(1, 3), matched_interests=[1, 5]) for i in range(1, 21)
+        ],
+    }
+    search = {'query': '비타민', 'total': 5000, 'supplements': [supplement(i) for i in range(1, 101)]}
+    user = {
+        'user_id': 1, 'username': 'heal_user', 'name': '홍길동', 'gender': 'male',
+        'birth_date': '2000-01-01', 'created_date': '2024-01-01 12:00:00', 'modified_date': '2024-01-01 12:00:00',
+    }
+    popularity = {
+        'as_of': 1700000000.0,
+        'interests': [
+            {
+                'interests_id': i + 1, 'category': c, 'total': rng.randint(100, 10000),
+                'by_gender': {'male': rng.randint(1, 5000), 'female': rng.randint(1, 5000)},
+                'by_age_band': {f'{band}대': rng.randint(1, 2000) for band in range(10, 70, 10)},
+                'by_gender_age_band': {
+                    gender: {f'{band}대': rng.randint(1, 1000) for band in range(10, 70, 10)}
+                    for gender in ('male', 'female')
+                },
+            }
+            for i, c in enumerate(CATEGORIES)
+        ],
+    }
+    export = {
+        'user_id': 1, 'username': 'heal_user', 'password': '$2b$12$' + 'a' * 53, 'name': '홍길동',
+        'gender': 'male', 'birth_date': date(2000, 1, 1), 'created_date': datetime(2024, 1, 1, 12),
+        'modified_date': datetime(2024, 1, 1, 12), 'interests': [1, 2, 3],
+    }
+    return [
+        ('GET /interests', interests),
+        ('GET /users/me/recommendations', recommendations),
+        ('GET /supplements/search', search),
+        ('GET /users/me', user),
+        ('GET /admin/analytics/...', popularity),
+        ('export 1줄 (date 포함)', export),
+    ]
+
+
+def time_per_call(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    payloads = build_payloads(rng)
+
+    stdlib_app = Flask('stdlib')
+    orjson_app = Flask('orjson')
+    orjson_app.json = OrjsonProvider(orjson_app)
+    assert isinstance(stdlib_app.json, DefaultJSONProvider)
+
+    print(f'{"payload":<30}{"stdlib us":>11}{"orjson us":>11}{"x":>7}{"stdlib B":>10}{"orjson B":>10}'
+          f'{"gzip B":>9}{"gzip us":>9}{"br B":>8}{"br us":>8}')
+    for label, payload in payloads:
+        with stdlib_app.app_context():
+            stdlib_us = time_per_call(lambda: stdlib_app.json.response(payload), args.iterations)
+            stdlib_body = stdlib_app.json.response(payload).get_data()
+        with orjson_app.app_context():
+            orjson_us = time_per_call(lambda: orjson_app.json.response(payload), args.iterations)
+            orjson_body = orjson_app.json.response(payload).get_data()
+
+        compress_iterations = max(args.iterations // 10, 1)
+        gzip_body = gzip.compress(orjson_body, compresslevel=6, mtime=0)
+        gzip_us = time_per_call(lambda: gzip.compress(orjson_body, compresslevel=6, mtime=0), compress_iterations)
+        if brotli is not None:
+            br_size = len(brotli.compress(orjson_body, quality=4))
+            br_us = time_per_call(lambda: brotli.compress(orjson_body, quality=4), compress_iterations)
+        else:
+            br_size, br_us = 0, 0.0
+
+        print(f'{label:<30}{stdlib_us:>11.1f}{orjson_us:>11.1f}{stdlib_us / orjson_us:>7.1f}'
+              f'{len(stdlib_body):>10}{len(orjson_body):>10}{len(gzip_body):>9}{gzip_us:>9.1f}'
+              f'{br_size:>8}{br_us:>8.1f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON 직렬화 / 응답 압축 마이크로 벤치마크')
+    parser.add_argument('--iterations', type=int, default=5000, help='페이로드별 직렬화 반복 횟수')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
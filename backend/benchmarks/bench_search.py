@@ -0,0 +1,145 @@
+"""영양제 검색 색인 지연 벤치마크
+
+합성 영양제 N개(기본 100,000개)로 n-gram 검색 색인을 구성하고,
+질의 유형별(한 글자/두 글자/단어/여러 단어/초성/관심분야 필터) p50/p95/p99 지연을 출력한다.
+비교용으로 LIKE '%…%' 와 같은 방식의 전체 순회 검색 지연도 함께 측정한다.
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --supplements 100000 --queries 300 --scan-queries 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supplement_search import SupplementSearchIndex, normalize  # noqa: E402
+
+
+BRANDS = ['뉴트리', '헬스원', '바이오', '네이처', '굿데이', '프라임', '데일리', '그린', '퓨어', '라이프']
+INGREDIENTS = [
+    '비타민C', '비타민D', '비타민B', '종합비타민', '오메가3', '루테인', '밀크씨슬', '유산균',
+    '프로바이오틱스', '마그네슘', '칼슘', '아연', '철분', '홍삼', '콜라겐', '코엔자임Q10',
+    '글루코사민', '쏘팔메토', '프로폴리스', '엽산', '비오틴', '크릴오일', '아르기닌', '멜라토닌',
+]
+FORMS = ['정', '캡슐', '골드', '플러스', '맥스', '1000', '데일리', '포르테', '액티브', '케어']
+DESCRIPTION_WORDS = [
+    '면역력', '강화', '피로', '개선', '눈', '건강', '관절', '뼈', '소화', '수면', '스트레스',
+    '관리', '피부', '혈액순환', '간', '에너지', '항산화', '함유', '도움', '하루', '한', '알',
+]
+
+# (질의 유형, 질의 목록)
+QUERY_KINDS = [
+    ('1글자', ['비', '칼', '홍', '유', '루']),
+    ('2글자', ['비타', '오메', '유산', '콜라', '마그']),
+    ('단어', ['비타민', '오메가3', '프로바이오틱스', '밀크씨슬', '루테인']),
+    ('여러 단어', ['비타민 면역력', '유산균 소화', '오메가 혈액순환', '홍삼 피로 개선', '칼슘 뼈']),
+    ('초성', ['ㅂㅌㅁ', 'ㅇㅁㄱ', 'ㅇㅅㄱ', 'ㅎㅅ', 'ㄹㅌㅇ']),
+    ('없음', ['존재하지않는', '가나다라', 'zzzz', '비타민Z', 'ㅋㅋㅋ']),
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def generate_rows(count, rng):
+    rows = []
+    for supplements_id in range(1, count + 1):
+        name = f'{rng.choice(BRANDS)} {rng.choice(INGREDIENTS)} {rng.choice(FORMS)}'
+        description = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(5, 15)))
+        rows.append((supplements_id, name, description))
+    return rows
+
+
+def generate_interest_filter(count, rng):
+    # 관심분야 하나에 전체의 약 1/10 이 매핑된 상황
+    return set(rng.sample(range(1, count + 1), count // 10))
+
+
+# LIKE '%…%' 와 같은 전체 순회 (모든 행의 이름/설명을 매번 확인)
+def scan_search(rows, query, limit):
+    words = normalize(query)
+    matched = []
+    for supplements_id, name, description in rows:
+        text = ' '.join(normalize(name) + normalize(description))
+        if all(word in text for word in words):
+            matched.append(supplements_id)
+    return matched[:limit], len(matched)
+
+
+def measure(fn, queries, rounds):
+    timings = []
+    total = 0
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            _, total = fn(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'count': len(timings),
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'mean': statistics.fmean(timings),
+        'last_total': total,
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    rows = generate_rows(args.supplements, rng)
+    allowed_ids = generate_interest_filter(args.supplements, rng)
+
+    index = SupplementSearchIndex(loader=lambda: rows)
+    started = time.perf_counter()
+    index.rebuild()
+    build_seconds = time.perf_counter() - started
+    stats = index.stats()
+    print(f'supplements={args.supplements} build={build_seconds:.2f}s grams={stats["grams"]} '
+          f'choseong_grams={stats["choseong_grams"]}')
+    print()
+    print(f'{"질의 유형":<14}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"mean ms":>10}')
+
+    rounds = max(args.queries // 5, 1)
+    for kind, queries in QUERY_KINDS:
+        result = measure(lambda q: index.search(q, limit=args.limit), queries, rounds)
+        print_row(kind, result)
+    filtered = measure(
+        lambda q: index.search(q, limit=args.limit, allowed_ids=allowed_ids), QUERY_KINDS[2][1], rounds
+    )
+    print_row('단어+관심분야', filtered)
+    # 후보가 가장 많은 경우: 첫 페이지 이후 (offset) 요청
+    paged = measure(lambda q: index.search(q, limit=args.limit, offset=100), ['비타민'], rounds)
+    print_row('단어 offset=100', paged)
+
+    if args.scan_queries:
+        scan = measure(lambda q: scan_search(rows, q, args.limit), QUERY_KINDS[2][1], max(args.scan_queries // 5, 1))
+        print_row('전체 순회(비교)', scan)
+
+
+def print_row(label, result):
+    print(f'{label:<14}{result["count"]:>7}{result["p50"]:>10.3f}{result["p95"]:>10.3f}'
+          f'{result["p99"]:>10.3f}{result["mean"]:>10.3f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='영양제 검색 색인 지연 벤치마크')
+    parser.add_argument('--supplements', type=int, default=100000, help='합성 영양제 수')
+    parser.add_argument('--queries', type=int, default=300, help='질의 유형별 측정 횟수')
+    parser.add_argument('--scan-queries', type=int, default=10, help='전체 순회 비교 측정 횟수 (0이면 생략)')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import re
+from datetime import datetime
+
+import orjson
+
+
+# 가져오기에서 허용하는 비밀번호: 이미 해싱된 bcrypt 문자열만 ($2a$/$2b$/$2y$, 비용 04~31)
+BCRYPT_HASH_RE = re.compile(r'^\$2[aby]\$(0[4-9]|[12][0-9]|3[01])\$[./A-Za-z0-9]{53}$')
+GENDERS = ('male', 'female')
+REQUIRED_FIELDS = ('username', 'password', 'name', 'gender', 'birth_date')
+
+
+# 내보내기 한 줄 (사용자 1명 + 관심분야 ID 목록)
+def export_line(user_row, interest_ids):
+    record = {
+        'user_id': user_row.user_id,
+        'username': user_row.username,
+        'password': user_row.password,
+        'name': user_row.name,
+        'gender': user_row.gender,
+        'birth_date': user_row.birth_date,
+        'created_date': user_row.created_date,
+        'modified_date': user_row.modified_date,
+        'interests': interest_ids,
+    }
+    # orjson 은 date/datetime 을 ISO 8601 로 직렬화하고 bytes 를 바로 반환
+    return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+
+# user ⋈ user_interests 행 스트림(user_id 순)을 사용자 단위 NDJSON 줄로 묶음
+# 한 사용자의 행만 메모리에 두므로 전체 크기와 관계없이 메모리 사용량이 일정함
+def group_export_lines(rows):
+    current = None
+    interest_ids = []
+    for row in rows:
+        if current is not None and row.user_id != current.user_id:
+            yield export_line(current, interest_ids)
+            interest_ids = []
+        current = row
+        if row.interests_id is not None:
+            interest_ids.append(row.interests_id)
+    if current is not None:
+        yield export_line(current, interest_ids)
+
+
+# 가져오기 한 줄을 검증해 user 컬럼 dict 와 관심분야 ID 목록으로 변환 (잘못된 줄은 ValueError)
+# user_id 는 무시하고 새로 발급하며, created_date/modified_date 는 있으면 유지
+def parse_import_line(raw):
+    try:
+        record = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        raise ValueError('JSON 형식이 아닙니다.')
+    if not isinstance(record, dict):
+        raise ValueError('각 줄은 JSON 객체여야 합니다.')
+
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        raise ValueError(f'필수 항목이 없습니다: {", ".join(missing)}')
+    for field in REQUIRED_FIELDS:
+        if not isinstance(record[field], str):
+            raise ValueError(f'{field}는 문자열이어야 합니다.')
+    if len(record['username']) > 50:
+        raise ValueError('username은 50자 이하여야 합니다.')
+    if len(record['name']) > 20:
+        raise ValueError('name은 20자 이하여야 합니다.')
+    if record['gender'] not in GENDERS:
+        raise ValueError('gender는 male 또는 female이어야 합니다.')
+    if not BCRYPT_HASH_RE.match(record['password']):
+        raise ValueError('password는 bcrypt 해시여야 합니다.')
+
+    user = {
+        'username': record['username'],
+        'password': record['password'],
+        'name': record['name'],
+        'gender': record['gender'],
+        'birth_date': _parse_date(record['birth_date'], 'birth_date'),
+    }
+    for field in ('created_date', 'modified_date'):
+        if record.get(field):
+            user[field] = _parse_datetime(record[field], field)
+
+    interests = record.get('interests', [])
+    if not isinstance(interests, list) or any(
+        isinstance(interest_id, bool) or not isinstance(interest_id, int) for interest_id in interests
+    ):
+        raise ValueError('interests는 정수 리스트여야 합니다.')
+    return user, list(dict.fromkeys(interests))
+
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'{field}는 YYYY-MM-DD 형식이어야 합니다.')
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field}는 ISO 8601 형식이어야 합니다.')
@@ -0,0 +1,114 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 만 사용
+    brotli = None
+
+
+# 응답 압축 (Accept-Encoding 협상: br > gzip)
+# - 일반 응답은 본문이 COMPRESS_MIN_SIZE 바이트 이상일 때만 압축 (작은 응답은 압축 비용이 더 큼)
+# - 스트리밍 응답(NDJSON 내보내기 등)은 크기를 미리 알 수 없으므로 청크 단위로 압축
+# - 압축하면 본문 바이트가 달라지므로 강한 ETag 는 약한 ETag(W/"...")로 바꾼다 (nginx 와 같은 방식)
+#   If-None-Match 는 약한 비교로 확인해야 함
+class Compressor:
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self.mimetypes = frozenset()
+        self.compressed = 0
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        self.min_size = int(app.config.setdefault('COMPRESS_MIN_SIZE', 1024))
+        self.gzip_level = int(app.config.setdefault('COMPRESS_GZIP_LEVEL', 6))
+        self.brotli_quality = int(app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4))
+        self.mimetypes = frozenset(app.config.setdefault(
+            'COMPRESS_MIMETYPES', ['application/json', 'application/x-ndjson', 'text/plain']
+        ))
+        if app.config['COMPRESS_ENABLED']:
+            app.after_request(self._after_request)
+
+    def _choose_encoding(self, accept_encodings):
+        if brotli is not None and accept_encodings['br']:
+            return 'br'
+        if accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def _after_request(self, response):
+        if (response.status_code != 200 or request.method == 'HEAD'
+                or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                self.skipped_small += 1
+                return response
+            compressed = self._compress(data, encoding)
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        self.compressed += 1
+        return response
+
+    def _compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            compress, finish = compressor.compress, compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                self.bytes_in += len(chunk)
+                out = compress(chunk)
+                if out:
+                    self.bytes_out += len(out)
+                    yield out
+            out = finish()
+            self.bytes_out += len(out)
+            yield out
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def stats(self):
+        return {
+            'brotli': brotli is not None,
+            'min_size': self.min_size,
+            'compressed': self.compressed,
+            'skipped_small': self.skipped_small,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+# 커넥션 풀 대기 통계 (checkout 횟수, 대기 시간, 타임아웃)
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record(self, wait_time, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_time_avg': self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+                'wait_time_max': self.wait_time_max,
+            }
+
+
+# 풀에서 커넥션을 얻기까지 걸린 시간을 기록하는 QueuePool
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+    # dispose() 로 풀이 다시 만들어져도 통계는 유지
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+# DB URI 에 맞는 SQLALCHEMY_ENGINE_OPTIONS 생성
+def build_engine_options(uri, pool_size, max_overflow, pool_recycle, pool_pre_ping, pool_timeout,
+                         connect_timeout, read_timeout, write_timeout):
+    url = make_url(uri)
+    options = {'pool_pre_ping': pool_pre_ping}
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # 메모리 SQLite 는 커넥션 하나를 공유해야 하므로 기본 풀 사용
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_recycle': pool_recycle,
+        'pool_timeout': pool_timeout,
+    })
+    if url.get_backend_name() == 'mysql':
+        options['connect_args'] = {
+            'connect_timeout': connect_timeout,
+            'read_timeout': read_timeout,
+            'write_timeout': write_timeout,
+        }
+    return options
+
+
+# 새 커넥션마다 utf8mb4 세션 설정 적용 (풀의 모든 커넥션에 적용됨)
+def _set_utf8mb4(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SET NAMES 'utf8mb4'")
+        cursor.execute("SET character_set_connection = 'utf8mb4'")
+        cursor.execute("SET character_set_results = 'utf8mb4'")
+        cursor.execute("SET character_set_client = 'utf8mb4'")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine):
+    if engine.dialect.name == 'mysql' and not event.contains(engine, 'connect', _set_utf8mb4):
+        event.listen(engine, 'connect', _set_utf8mb4)
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),  # pool_size 를 넘어 추가로 연 커넥션 수
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.wait_stats.snapshot())
+    return stats
@@ -0,0 +1,197 @@
+import itertools
+import logging
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+from background import DaemonLoop
+from db_pool import pool_stats
+
+
+logger = logging.getLogger('flask_app')
+
+
+# 읽기 전용 복제본 라우팅 세션
+# 읽기 요청(GET/HEAD)의 일반 SELECT 만 복제본으로 보내고, 그 밖의 구문(INSERT/UPDATE/DELETE, FOR UPDATE,
+# text())과 flush, 요청 밖(CLI, 백그라운드 스레드)의 조회는 모두 주 DB 로 보낸다.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return primary
+        router = current_app.extensions.get('replica_router')
+        if router is None or not router.replicas or primary is not self._db.engines.get(None):
+            return primary
+        if self._flushing or not _is_read_only(clause):
+            router.stick_to_primary()
+            return primary
+        return router.read_engine() or primary
+
+
+def _is_read_only(clause):
+    return (clause is not None and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None)
+
+
+class _Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.reads = 0
+        self.failures = 0
+        self.last_error = None
+
+
+# 복제본 풀: SQLALCHEMY_BINDS 의 replica_* 엔진을 라운드 로빈으로 고르고, 상태 확인에 실패한 복제본은 건너뜀
+# - 같은 요청 안에서는 처음 고른 복제본을 계속 사용 (요청당 커넥션 1개)
+# - 요청에서 한 번이라도 쓰기(flush/DML)가 일어나면 이후 조회는 주 DB 로 (쓰기 후 읽기 일관성)
+# - 쓰기가 있었던 응답에는 짧은 수명의 쿠키를 붙여 같은 클라이언트의 다음 읽기도 잠시 주 DB 로 보냄
+#   (복제 지연 동안 방금 바꾼 값이 예전 값으로 보이거나 사용자 캐시에 예전 값이 들어가는 것을 막음)
+class ReplicaRouter:
+    def __init__(self, app=None, db=None):
+        self.replicas = []
+        self.read_methods = frozenset(('GET', 'HEAD'))
+        self.sticky_seconds = 5
+        self.sticky_cookie = 'heal_db_primary'
+        self.health_check_interval = 10
+        self._cursor = itertools.count()
+        self._checker = DaemonLoop('db-replica-health')
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self.health_checks = 0
+        self.health_check_failures = 0
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.read_methods = frozenset(m.upper() for m in app.config.setdefault('DB_REPLICA_READ_METHODS', ['GET', 'HEAD']))
+        self.sticky_seconds = int(app.config.setdefault('DB_REPLICA_STICKY_SECONDS', 5))
+        self.sticky_cookie = app.config.setdefault('DB_REPLICA_STICKY_COOKIE', 'heal_db_primary')
+        self.health_check_interval = float(app.config.setdefault('DB_REPLICA_HEALTH_CHECK_INTERVAL', 10))
+
+        with app.app_context():
+            engines = db.engines
+        self.replicas = [
+            _Replica(key, engines[key])
+            for key in sorted((key for key in engines if key and key.startswith('replica_')), key=lambda k: int(k[8:]))
+        ]
+        for replica in self.replicas:
+            if not event.contains(replica.engine, 'handle_error', self._handle_error):
+                event.listen(replica.engine, 'handle_error', self._handle_error)
+        app.extensions['replica_router'] = self
+        if self.replicas:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def watch(self, session):
+        # ORM flush 가 일어난 요청은 이후 조회를 주 DB 로 고정
+        if not event.contains(session, 'after_flush', self._after_flush):
+            event.listen(session, 'after_flush', self._after_flush)
+
+    def _after_flush(self, session, flush_context):
+        if has_request_context():
+            self.stick_to_primary()
+
+    def _before_request(self):
+        g._db_replica = None
+        g._db_wrote = False
+
+    def _after_request(self, response):
+        if g.get('_db_wrote') and self.sticky_seconds > 0:
+            response.set_cookie(self.sticky_cookie, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def stick_to_primary(self):
+        g._db_wrote = True
+
+    # 현재 요청이 읽을 복제본 엔진 (복제본을 쓰면 안 되거나 건강한 복제본이 없으면 None)
+    def read_engine(self):
+        if not self.replicas or not has_request_context() or request.method not in self.read_methods:
+            return None
+        if g.get('_db_wrote') or request.cookies.get(self.sticky_cookie):
+            self.primary_reads += 1
+            return None
+
+        replica = g.get('_db_replica')
+        if replica is None or not replica.healthy:
+            replica = self._choose()
+            g._db_replica = replica
+        if replica is None:
+            self.fallbacks += 1
+            return None
+        replica.reads += 1
+        self.replica_reads += 1
+        return replica.engine
+
+    def _choose(self):
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._cursor) % len(healthy)]
+
+    def _handle_error(self, context):
+        # 연결이 끊긴 복제본은 다음 상태 확인에서 복구될 때까지 제외
+        if context.is_disconnect and context.engine is not None:
+            for replica in self.replicas:
+                if replica.engine is context.engine:
+                    self._mark(replica, False, str(context.original_exception))
+
+    def _mark(self, replica, healthy, error=None):
+        if replica.healthy != healthy:
+            if healthy:
+                logger.info('DB 복제본 복구', extra={'replica': replica.name})
+            else:
+                logger.warning('DB 복제본 제외', extra={'replica': replica.name, 'error': error})
+        replica.healthy = healthy
+        if not healthy:
+            replica.failures += 1
+            replica.last_error = error
+
+    # 모든 복제본에 SELECT 1 을 보내 상태 갱신
+    def check(self):
+        for replica in self.replicas:
+            self.health_checks += 1
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+            except Exception as e:
+                self.health_check_failures += 1
+                self._mark(replica, False, str(e))
+            else:
+                self._mark(replica, True)
+
+    def start_health_checker(self):
+        if not self.replicas or self.health_check_interval <= 0:
+            return
+
+        def on_error(e):
+            logger.error(f'DB 복제본 상태 확인 중 오류 발생: {e}')
+
+        self._checker.start(self.check, lambda: self.health_check_interval, on_error)
+
+    def stats(self):
+        return {
+            'replicas': len(self.replicas),
+            'healthy': sum(1 for replica in self.replicas if replica.healthy),
+            'sticky_seconds': self.sticky_seconds,
+            'health_check_interval': self.health_check_interval,
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads,
+            'fallbacks': self.fallbacks,
+            'health_checks': self.health_checks,
+            'health_check_failures': self.health_check_failures,
+            'nodes': [
+                dict(
+                    name=replica.name,
+                    healthy=replica.healthy,
+                    reads=replica.reads,
+                    failures=replica.failures,
+                    last_error=replica.last_error,
+                    pool=pool_stats(replica.engine),
+                )
+                for replica in self.replicas
+            ],
+        }
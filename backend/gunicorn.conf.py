@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+
+# gunicorn 설정 (모든 값은 환경 변수로 조정)
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# 워커 프로세스 수와 워커당 스레드 수
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# keep-alive, 요청 제한 시간, 재시작 시 진행 중 요청을 기다리는 시간(초)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# 앱을 마스터에서 미리 로드하지 않음: 워커마다 fork 이후 create_app 이 실행되어
+# DB 엔진과 로그 핸들러(소켓)가 워커 간에 공유되지 않음
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+# bcrypt 비용을 지정하지 않았으면 마스터에서 한 번 보정해 환경 변수로 워커에 전달
+# (워커마다 따로 보정하면 측정 편차로 비용이 달라져 로그인마다 재해싱이 반복될 수 있음)
+def on_starting(server):
+    if os.environ.get('BCRYPT_LOG_ROUNDS'):
+        return
+    from hashing import calibrate_rounds
+    rounds, duration = calibrate_rounds(
+        float(os.environ.get('BCRYPT_LATENCY_BUDGET_MS', 250)) / 1000,
+        min_rounds=int(os.environ.get('BCRYPT_MIN_ROUNDS', 12)),
+        max_rounds=int(os.environ.get('BCRYPT_MAX_ROUNDS', 16)),
+    )
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(rounds)
+    server.log.info('bcrypt 비용 보정: rounds=%d, 해시 1회 %.0fms', rounds, duration * 1000)
@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+# 해싱 풀이 가득 찼거나 응답 시간을 넘긴 경우 발생 (503 + Retry-After 로 응답)
+class HashingBusyError(Exception):
+    def __init__(self, retry_after):
+        super().__init__('비밀번호 처리 요청이 많습니다. 잠시 후 다시 시도해주세요.')
+        self.retry_after = retry_after
+
+
+# 워커 프로세스에서 실행되는 함수 (실행 시간을 함께 반환해 대기 시간을 계산)
+def _hash_password(password, rounds):
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    return hashed, time.perf_counter() - started
+
+
+def _check_password(pw_hash, password):
+    started = time.perf_counter()
+    matched = bcrypt.checkpw(password, pw_hash)
+    return matched, time.perf_counter() - started
+
+
+# 저장된 bcrypt 해시의 비용(log rounds): $2b$12$... -> 12 (bcrypt 해시가 아니면 None)
+def hash_rounds(pw_hash):
+    if isinstance(pw_hash, bytes):
+        pw_hash = pw_hash.decode('utf-8', 'replace')
+    parts = pw_hash.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+# 해시 1회 시간이 budget(초) 이하인 가장 높은 비용을 min_rounds~max_rounds 에서 선택
+# min_rounds 는 하한이므로 느린 서버에서는 budget 을 넘더라도 min_rounds 를 사용
+# bcrypt 는 비용이 1 오를 때마다 시간이 2배이므로 낮은 비용에서 잰 시간으로 추정한 뒤, 고른 비용을 한 번 더 재서 확인
+# 반환값: (비용, 고른 비용의 해시 1회 시간 초)
+def calibrate_rounds(budget, min_rounds=12, max_rounds=16, base_rounds=8, samples=3):
+    password = b'calibration-password'
+    base = min(_hash_password(password, base_rounds)[1] for _ in range(samples))
+    rounds = min_rounds
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - base_rounds) <= budget:
+        rounds += 1
+    duration = _hash_password(password, rounds)[1]
+    while rounds > min_rounds and duration > budget:
+        rounds -= 1
+        duration = _hash_password(password, rounds)[1]
+    return rounds, duration
+
+
+# bcrypt 해싱/검증을 요청 스레드 대신 프로세스 풀에서 수행하는 서비스
+# 동시에 받아들이는 작업 수는 workers + queue_depth 로 제한하고, 초과하면 즉시 HashingBusyError
+class HashingService:
+    def __init__(self, app=None):
+        self.max_workers = 2
+        self.queue_depth = 16
+        self.timeout = 10.0
+        self.retry_after = 1
+        self.rounds = 12
+        self.calibrated_hash_time = None
+        self.start_method = 'spawn'
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._slots = None
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+        # 연산이 끝날 때마다 (operation, 처리 시간 초) 로 호출되는 리스너 (메트릭 수집용)
+        self.listeners = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_workers = int(app.config.setdefault('HASH_POOL_WORKERS', os.cpu_count() or 1))
+        self.queue_depth = int(app.config.setdefault('HASH_POOL_QUEUE_DEPTH', 16))
+        self.timeout = float(app.config.setdefault('HASH_POOL_TIMEOUT', 10))
+        self.retry_after = int(app.config.setdefault('HASH_POOL_RETRY_AFTER', 1))
+        self.rounds = app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        if self.rounds is None:
+            # 비용을 지정하지 않았으면 이 서버에서 해시 시간이 예산 이하인 가장 높은 비용으로 보정해 config 에 저장
+            self.rounds, self.calibrated_hash_time = calibrate_rounds(
+                float(app.config.setdefault('BCRYPT_LATENCY_BUDGET_MS', 250)) / 1000,
+                min_rounds=int(app.config.setdefault('BCRYPT_MIN_ROUNDS', 12)),
+                max_rounds=int(app.config.setdefault('BCRYPT_MAX_ROUNDS', 16)),
+            )
+            app.config['BCRYPT_LOG_ROUNDS'] = self.rounds
+        self.rounds = int(self.rounds)
+        # 요청 스레드가 떠 있는 상태에서 fork 하지 않도록 기본값은 spawn
+        self.start_method = app.config.setdefault('HASH_POOL_START_METHOD', 'spawn')
+        self._slots = threading.BoundedSemaphore(max(self.max_workers, 1) + self.queue_depth)
+
+    def _reset_stats(self):
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.hash_time_total = 0.0
+        self.rehashed = 0
+        self.rehash_errors = 0
+
+    # fork 이후 상속된 풀은 쓸 수 없으므로 프로세스마다 처음 사용할 때 생성
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _release(self, future=None):
+        with self._stats_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _notify(self, operation, duration):
+        for listener in self.listeners:
+            listener(operation, duration)
+
+    def _run(self, operation, fn, *args):
+        # 풀을 쓰지 않도록 설정된 경우(HASH_POOL_WORKERS=0) 요청 스레드에서 직접 실행
+        if self.max_workers <= 0:
+            result, duration = fn(*args)
+            with self._stats_lock:
+                self.submitted += 1
+                self.completed += 1
+                self.hash_time_total += duration
+            self._notify(operation, duration)
+            return result
+
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HashingBusyError(self.retry_after)
+
+        with self._stats_lock:
+            self.in_flight += 1
+            self.submitted += 1
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            result, duration = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._stats_lock:
+                self.rejected += 1
+            raise HashingBusyError(self.retry_after)
+        except BrokenProcessPool:
+            # 워커 프로세스가 비정상 종료되면 풀을 버리고 다음 요청에서 새로 생성
+            with self._executor_lock:
+                if self._executor is not None and self._executor_pid == os.getpid():
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            raise
+
+        wait_time = max(time.perf_counter() - started - duration, 0.0)
+        with self._stats_lock:
+            self.completed += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+            self.hash_time_total += duration
+        self._notify(operation, duration)
+        return result
+
+    def generate_password_hash(self, password):
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        hashed = self._run('hash', _hash_password, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    def check_password_hash(self, pw_hash, password):
+        if isinstance(pw_hash, str):
+            pw_hash = pw_hash.encode('utf-8')
+        return self._run('check', _check_password, pw_hash, password.encode('utf-8'))
+
+    # 저장된 해시의 비용이 현재 비용보다 낮으면 같은 비밀번호로 다시 해싱한 값을 반환 (같거나 높으면 None)
+    # 비용을 낮추는 방향으로는 다시 해싱하지 않음 (하드웨어가 다른 서버끼리 같은 사용자를 번갈아 다시 해싱하지 않도록)
+    # 로그인에서 비밀번호 확인에 성공한 직후 호출
+    def rehash_if_needed(self, pw_hash, password):
+        rounds = hash_rounds(pw_hash)
+        if rounds is not None and rounds >= self.rounds:
+            return None
+        try:
+            new_hash = self.generate_password_hash(password)
+        except Exception:
+            with self._stats_lock:
+                self.rehash_errors += 1
+            raise
+        with self._stats_lock:
+            self.rehashed += 1
+        return new_hash
+
+    def stats(self):
+        with self._stats_lock:
+            workers = max(self.max_workers, 1)
+            completed = self.completed
+            return {
+                'workers': self.max_workers,
+                'queue_depth': self.queue_depth,
+                'in_flight': self.in_flight,
+                'queued': max(self.in_flight - workers, 0),
+                'utilisation': min(self.in_flight, workers) / workers,
+                'submitted': self.submitted,
+                'completed': completed,
+                'rejected': self.rejected,
+                'wait_time_avg': self.wait_time_total / completed if completed else 0.0,
+                'wait_time_max': self.wait_time_max,
+                'hash_time_avg': self.hash_time_total / completed if completed else 0.0,
+                'rounds': self.rounds,
+                'calibrated_hash_time': self.calibrated_hash_time,
+                'rehashed': self.rehashed,
+                'rehash_errors': self.rehash_errors,
+            }
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+
+
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['items', 'ids', 'etag', 'loaded_at'])
+
+
+# interests 테이블 전체를 프로세스 내에 보관하는 스냅샷
+# 시작 시 한 번 읽고, INTEREST_CATALOG_REFRESH_INTERVAL 초가 지나거나 refresh() 를 호출하면 다시 읽는다.
+# loader 는 (interests_id, category) 행 목록을 반환하는 함수 (앱 컨텍스트 안에서 호출됨)
+class InterestCatalog:
+    def __init__(self, app=None, loader=None):
+        self.refresh_interval = 300
+        self.retry_interval = 30
+        self._loader = loader
+        self._snapshot = None
+        self._next_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh_errors = 0
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app, loader=None):
+        self.refresh_interval = float(app.config.setdefault('INTEREST_CATALOG_REFRESH_INTERVAL', 300))
+        app.config.setdefault('INTEREST_CATALOG_CACHE_CONTROL', 'public, max-age=300')
+        if loader is not None:
+            self._loader = loader
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def is_stale(self):
+        return self._snapshot is None or time.monotonic() >= self._next_refresh
+
+    def mark_stale(self):
+        self._next_refresh = 0.0
+
+    def snapshot(self):
+        if self.is_stale():
+            self._refresh_if_stale()
+        return self._snapshot
+
+    def _refresh_if_stale(self):
+        # 만료 시점에 여러 요청이 동시에 DB를 읽지 않도록 한 스레드만 갱신
+        if not self._refresh_lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            if self.is_stale():
+                self._refresh_locked()
+        except Exception:
+            # 이전 스냅샷이 있으면 그대로 제공하고 잠시 후 다시 시도
+            if self._snapshot is None:
+                raise
+            self._next_refresh = time.monotonic() + self.retry_interval
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self):
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self):
+        try:
+            rows = self._loader()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        items = [{'interests_id': row[0], 'category': row[1]} for row in rows]
+        canonical = json.dumps(items, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        etag = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+        now = time.monotonic()
+        self._snapshot = CatalogSnapshot(
+            items=items,
+            ids=frozenset(item['interests_id'] for item in items),
+            etag=etag,
+            loaded_at=time.time(),
+        )
+        self._next_refresh = now + self.refresh_interval
+        self.refreshes += 1
+        return self._snapshot
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'size': len(snapshot.items) if snapshot else 0,
+            'etag': snapshot.etag if snapshot else None,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'refresh_interval': self.refresh_interval,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+        }
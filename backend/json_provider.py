@@ -0,0 +1,35 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+# orjson 기반 Flask JSON 프로바이더
+# - 한글 등 비ASCII 문자를 \uXXXX 로 이스케이프하지 않고 UTF-8 그대로 출력
+# - date/datetime 은 ISO 8601 문자열, 그 밖의 타입(Decimal 등)은 Flask 기본 변환을 사용
+# - jsonify 응답은 문자열을 거치지 않고 bytes 로 바로 만듦
+class OrjsonProvider(DefaultJSONProvider):
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # orjson 이 지원하지 않는 인자(cls, ensure_ascii=True 등)가 오면 표준 json 으로 처리
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)
+        if kwargs:
+            return super().dumps(obj, indent=indent, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option(indent)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._option(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
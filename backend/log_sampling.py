@@ -0,0 +1,158 @@
+import json
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+from background import DaemonLoop
+
+
+# 로그 샘플링 필터 + 요약 집계
+# 성공 경로의 반복 INFO 로그를 메시지 키(로거, 라우트, 메시지)별로 N개 중 1개만 남기고,
+# 버린 로그는 라우트/사용자 버킷별 건수로 모아 summary_interval 초마다 요약 레코드 하나로 기록한다.
+# 로거 필터로 붙으므로 버린 레코드는 어떤 핸들러에서도 포맷/전송되지 않는다.
+#
+# LOG_SAMPLING_CONFIG (dict 또는 JSON 문자열)
+#   loggers:  {로거 이름: {'rate': N}}         필터를 붙일 로거와 기본 비율 (1이면 모두 남김, 0이면 요약만)
+#   routes:   {엔드포인트 또는 URL 규칙: {'rate': N}}  예: 'api.get_current_user', '/interests'
+#   messages: {메시지: {'rate': N}}            메시지별 비율 (우선순위: messages > routes > loggers)
+#   always_level: 이 레벨 이상(기본 WARNING)은 항상 남김
+#   slow_ms:      요청 시작 후 이 시간(ms)이 지난 뒤 기록된 로그는 항상 남김 (느린 요청)
+#   summary_interval: 요약 레코드 기록 주기(초), user_buckets: 사용자 버킷 수 (user_id % N)
+class LogSampler(logging.Filter):
+    def __init__(self, app=None):
+        super().__init__()
+        self.logger_rules = {}
+        self.route_rules = {}
+        self.message_rules = {}
+        self.always_level = logging.WARNING
+        self.slow_ms = 500.0
+        self.summary_interval = 60.0
+        self.user_buckets = 16
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._suppressed = {}  # (로거, 라우트, 메시지) -> {'count', 'rate', 'buckets'}
+        self._summarizer = DaemonLoop('log-sampling-summary')
+        self.kept = 0
+        self.dropped = 0
+        self.summaries = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config.setdefault('LOG_SAMPLING_CONFIG', {})
+        if isinstance(config, str):
+            config = json.loads(config)
+        self.logger_rules = {name: int(rule.get('rate', 1)) for name, rule in config.get('loggers', {}).items()}
+        self.route_rules = {route: int(rule.get('rate', 1)) for route, rule in config.get('routes', {}).items()}
+        self.message_rules = {message: int(rule.get('rate', 1)) for message, rule in config.get('messages', {}).items()}
+        self.always_level = logging.getLevelName(str(config.get('always_level', 'WARNING')).upper())
+        if not isinstance(self.always_level, int):
+            raise ValueError(f'알 수 없는 always_level: {config.get("always_level")}')
+        self.slow_ms = float(config.get('slow_ms', 500))
+        self.summary_interval = float(config.get('summary_interval', 60))
+        self.user_buckets = max(int(config.get('user_buckets', 16)), 1)
+
+        for name in set(self.logger_rules) | {'flask_app'}:
+            target = logging.getLogger(name)
+            for old in [f for f in target.filters if isinstance(f, LogSampler)]:
+                target.removeFilter(old)
+            target.addFilter(self)
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        g._log_started = time.perf_counter()
+
+    def _rate(self, record, route):
+        rate = self.message_rules.get(record.msg)
+        if rate is None and route is not None:
+            endpoint, rule = route
+            rate = self.route_rules.get(endpoint)
+            if rate is None and rule is not None:
+                rate = self.route_rules.get(rule)
+        if rate is None:
+            rate = self.logger_rules.get(record.name, 1)
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= self.always_level or getattr(record, 'log_sampling_summary', False):
+            return True
+
+        route = None
+        if has_request_context():
+            route = (request.endpoint, request.url_rule.rule if request.url_rule is not None else None)
+            started = g.get('_log_started')
+            if started is not None and (time.perf_counter() - started) * 1000 >= self.slow_ms:
+                return True
+
+        rate = self._rate(record, route)
+        if rate == 1:
+            return True
+
+        endpoint = route[0] if route is not None else None
+        key = (record.name, endpoint, str(record.msg))
+        with self._lock:
+            if key not in self._seen and len(self._seen) >= 10000:
+                # 메시지에 값이 섞여 키가 계속 늘어나는 경우를 대비한 상한
+                self._seen.clear()
+            seen = self._seen.get(key, 0) + 1
+            self._seen[key] = seen
+            if rate > 1 and seen % rate == 1:
+                self.kept += 1
+                record.sample_rate = rate  # 집계 시 건수 x sample_rate 로 추정할 수 있도록 표시
+                return True
+
+            self.dropped += 1
+            entry = self._suppressed.get(key)
+            if entry is None:
+                entry = self._suppressed[key] = {'count': 0, 'rate': rate, 'buckets': {}}
+            entry['count'] += 1
+            bucket = self._user_bucket(getattr(record, 'user_id', None))
+            entry['buckets'][bucket] = entry['buckets'].get(bucket, 0) + 1
+        return False
+
+    def _user_bucket(self, user_id):
+        try:
+            return str(int(user_id) % self.user_buckets)
+        except (TypeError, ValueError):
+            return 'anonymous'
+
+    # 모아 둔 건수를 요약 레코드로 기록하고 비움 (원래 로거로 기록해 같은 핸들러로 전송)
+    def flush(self):
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        for (logger_name, endpoint, message), entry in suppressed.items():
+            logging.getLogger(logger_name).info('로그 샘플링 요약', extra={
+                'log_sampling_summary': True,
+                'sampled_message': message,
+                'endpoint': endpoint,
+                'suppressed': entry['count'],
+                'sample_rate': entry['rate'],
+                'by_user_bucket': entry['buckets'],
+                'interval': self.summary_interval,
+            })
+            self.summaries += 1
+        return len(suppressed)
+
+    def start_summarizer(self):
+        if self.summary_interval <= 0:
+            return
+
+        def on_error(e):
+            logging.getLogger('flask_app').error(f'로그 샘플링 요약 기록 중 오류 발생: {e}')
+
+        self._summarizer.start(self.flush, lambda: self.summary_interval, on_error)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(entry['count'] for entry in self._suppressed.values())
+            keys = len(self._seen)
+        return {
+            'message_keys': keys,
+            'kept': self.kept,
+            'dropped': self.dropped,
+            'pending': pending,
+            'summaries': self.summaries,
+            'summary_interval': self.summary_interval,
+        }
@@ -0,0 +1,190 @@
+import copy
+import logging
+import os
+import socket
+import threading
+import traceback
+from collections import deque
+
+
+# Logstash tcp(json_lines) 입력으로 로그를 비동기 전송하는 핸들러
+# 요청 스레드는 레코드를 메모리 버퍼에 넣기만 하고, 포맷팅/전송은 백그라운드 스레드가 배치로 처리한다.
+# 버퍼가 가득 차면 overflow_policy 에 따라 처리한다.
+#   drop_oldest: 가장 오래된 레코드를 버리고 새 레코드를 넣음
+#   sample:      넘친 레코드 중 sample_rate 개마다 하나만 (가장 오래된 레코드를 밀어내고) 넣음
+class AsyncLogstashHandler(logging.Handler):
+    OVERFLOW_POLICIES = ('drop_oldest', 'sample')
+
+    def __init__(self, host, port, capacity=10000, batch_size=200, flush_interval=1.0,
+                 overflow_policy='drop_oldest', sample_rate=10, connect_timeout=3.0,
+                 max_backoff=30.0, level=logging.NOTSET):
+        super().__init__(level)
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'알 수 없는 overflow_policy: {overflow_policy}')
+        self.host = host
+        self.port = port
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_rate = max(int(sample_rate), 1)
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+
+        self._buffer = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self._thread = None
+        self._thread_pid = None
+        self._sock = None
+        self._pending = None  # 전송에 실패해 다시 보낼 배치
+        self._overflow_seen = 0
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.batches = 0
+        self.send_errors = 0
+        self.connections = 0
+
+    # 요청 경로: 레코드를 복사해 버퍼에 넣기만 함
+    def emit(self, record):
+        try:
+            self._ensure_thread()
+            prepared = self.prepare(record)
+            with self._cond:
+                if len(self._buffer) >= self.capacity:
+                    self._overflow_seen += 1
+                    if self.overflow_policy == 'sample' and self._overflow_seen % self.sample_rate:
+                        self.dropped += 1
+                        return
+                    self._buffer.popleft()
+                    self.dropped += 1
+                self._buffer.append(prepared)
+                self.enqueued += 1
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify()
+        except Exception:
+            self.handleError(record)
+
+    # 백그라운드 스레드에서 포맷할 수 있도록 메시지와 예외 정보를 미리 문자열로 확정
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exception = traceback.format_exception(*record.exc_info)
+            record.exc_info = None
+        return record
+
+    # fork 된 프로세스에는 스레드가 없으므로 프로세스마다 처음 기록할 때 시작
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread_pid == pid and self._thread is not None:
+            return
+        with self._cond:
+            if self._thread_pid == pid and self._thread is not None:
+                return
+            if self._thread_pid is not None:
+                # 부모 프로세스에서 상속된 버퍼와 소켓은 버림
+                self._buffer.clear()
+                self._sock = None
+                self._pending = None
+            self._thread = threading.Thread(target=self._run, name='logstash-shipper', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                # 배치가 찰 때까지 최대 flush_interval 초 기다린 뒤 모인 만큼 전송
+                if self._pending is None and len(self._buffer) < self.batch_size and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if self._closed and not self._buffer and self._pending is None:
+                    return
+                records = []
+                if self._pending is None:
+                    while self._buffer and len(records) < self.batch_size:
+                        records.append(self._buffer.popleft())
+
+            if self._pending is None:
+                if not records:
+                    continue
+                self._pending = (self._serialize(records), len(records))
+
+            if self._send(*self._pending):
+                self._pending = None
+                backoff = 0.0
+            else:
+                if self._closed:
+                    return
+                # 재연결 간격을 지수적으로 늘림
+                backoff = min(max(backoff * 2, 0.5), self.max_backoff)
+                with self._cond:
+                    self._cond.wait(backoff)
+
+    def _serialize(self, records):
+        lines = []
+        for record in records:
+            try:
+                line = self.format(record)
+                if isinstance(line, str):
+                    line = line.encode('utf-8')
+                lines.append(line + b'\n')
+            except Exception:
+                self.dropped += 1
+        return b''.join(lines)
+
+    def _send(self, payload, count):
+        if not payload:
+            return True
+        try:
+            if self._sock is None:
+                self._sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+                self.connections += 1
+            self._sock.sendall(payload)
+            self.sent += count
+            self.batches += 1
+            return True
+        except OSError:
+            self.send_errors += 1
+            self._close_socket()
+            return False
+
+    def _close_socket(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    # 종료 시 남은 로그를 timeout 초 안에서 최대한 전송
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._thread_pid == os.getpid():
+            thread.join(timeout)
+        self._close_socket()
+        super().close()
+
+    def stats(self):
+        with self._cond:
+            buffered = len(self._buffer)
+        return {
+            'host': self.host,
+            'port': self.port,
+            'capacity': self.capacity,
+            'buffered': buffered,
+            'overflow_policy': self.overflow_policy,
+            'enqueued': self.enqueued,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'send_errors': self.send_errors,
+            'connections': self.connections,
+        }
@@ -0,0 +1,279 @@
+import threading
+import time
+import weakref
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+
+# 기본 지연 시간 버킷 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+
+# 스레드별 저장소: 기록은 자기 스레드의 dict 에만 하므로 락이 필요 없고,
+# 스크레이프 시에만 락을 잡고 모든 스레드 값을 합산한다.
+# 종료된 스레드의 값은 스크레이프 때 retired 로 합쳐 목록이 계속 늘어나지 않게 한다.
+class _ThreadShards:
+    def __init__(self, merge):
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells = []  # (스레드 weakref, dict)
+        self._retired = {}
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = {}
+            with self._lock:
+                self._cells.append((weakref.ref(threading.current_thread()), cell))
+            self._local.cell = cell
+            return cell
+
+    def collect(self):
+        with self._lock:
+            alive = []
+            for thread_ref, cell in self._cells:
+                if thread_ref() is None or not thread_ref().is_alive():
+                    self._merge(self._retired, dict(cell))
+                else:
+                    alive.append((thread_ref, cell))
+            self._cells = alive
+            total = {}
+            self._merge(total, self._retired)
+            for _, cell in alive:
+                self._merge(total, dict(cell))
+            return total
+
+
+def _merge_numbers(target, source):
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+
+def _merge_histograms(target, source):
+    for key, value in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(value)
+        else:
+            for i, v in enumerate(value):
+                current[i] += v
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._shards = _ThreadShards(_merge_numbers)
+
+    def inc(self, labels=(), amount=1):
+        cell = self._shards.cell()
+        cell[labels] = cell.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self._shards.collect().items()):
+            yield self.name, labels, value
+
+
+# in-flight 처럼 같은 스레드에서 증가/감소하는 값은 스레드별 합으로 충분
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _ThreadShards(_merge_histograms)
+
+    def observe(self, labels, value):
+        cell = self._shards.cell()
+        state = cell.get(labels)
+        if state is None:
+            # 버킷별 개수 + (+Inf 개수, 합계)
+            state = cell[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def samples(self):
+        for labels, state in sorted(self._shards.collect().items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                yield self.name + '_bucket', labels + (('le', _format_value(bound)),), cumulative
+            cumulative += state[len(self.buckets)]
+            yield self.name + '_bucket', labels + (('le', '+Inf'),), cumulative
+            yield self.name + '_sum', labels, state[-1]
+            yield self.name + '_count', labels, cumulative
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(metric, labels):
+    # labels 는 labelnames 순서의 값 튜플이며, 히스토그램 버킷은 ('le', 값) 쌍이 뒤에 붙음
+    pairs = []
+    for i, value in enumerate(labels):
+        if isinstance(value, tuple):
+            pairs.append(value)
+        else:
+            pairs.append((metric.labelnames[i], value))
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+# Prometheus text format(0.0.4) 레지스트리
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._stats_sources = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    # 각 컴포넌트의 stats() dict 를 스크레이프 시점에 읽어 숫자 값만 노출
+    # counters 에 포함된 키는 counter(_total), 나머지는 gauge 로 노출
+    def register_stats(self, prefix, stats_fn, counters=()):
+        self._stats_sources.append((prefix, stats_fn, frozenset(counters)))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(metric, labels)} {_format_value(value)}')
+
+        for prefix, stats_fn, counters in self._stats_sources:
+            try:
+                stats = stats_fn() or {}
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if key in counters:
+                    name, metric_type = f'{prefix}_{key}_total', 'counter'
+                else:
+                    name, metric_type = f'{prefix}_{key}', 'gauge'
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# 모든 Flask 라우트의 요청 지연, 상태 코드, in-flight, 요청당 SQL 구문 수/DB 시간, bcrypt 시간 계측
+class RequestMetrics:
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.request_duration = r.histogram(
+            'heal_http_request_duration_seconds', '요청 처리 시간', ('endpoint', 'method'))
+        self.requests_total = r.counter(
+            'heal_http_requests_total', '응답 상태 코드별 요청 수', ('endpoint', 'method', 'status'))
+        self.in_flight = r.gauge(
+            'heal_http_requests_in_flight', '처리 중인 요청 수')
+        self.sql_statements = r.histogram(
+            'heal_http_request_sql_statements', '요청당 SQL 구문 수', ('endpoint',), SQL_COUNT_BUCKETS)
+        self.db_time = r.histogram(
+            'heal_http_request_db_seconds', '요청당 DB 실행 시간', ('endpoint',))
+        self.bcrypt_time = r.histogram(
+            'heal_http_request_bcrypt_seconds', '요청당 bcrypt 처리 시간', ('endpoint',))
+        self.bcrypt_duration = r.histogram(
+            'heal_bcrypt_duration_seconds', 'bcrypt 연산 1회 처리 시간', ('operation',))
+        self._statement_started = threading.local()
+
+    def init_app(self, app, db):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+                    event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                    event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        g._metrics = {'started': time.perf_counter(), 'sql': 0, 'db_time': 0.0, 'bcrypt_time': 0.0}
+        self.in_flight.inc()
+
+    def _after_request(self, response):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return response
+        endpoint = request.endpoint or '<unmatched>'
+        elapsed = time.perf_counter() - state['started']
+        self.request_duration.observe((endpoint, request.method), elapsed)
+        self.requests_total.inc((endpoint, request.method, str(response.status_code)))
+        self.sql_statements.observe((endpoint,), state['sql'])
+        self.db_time.observe((endpoint,), state['db_time'])
+        if state['bcrypt_time']:
+            self.bcrypt_time.observe((endpoint,), state['bcrypt_time'])
+        return response
+
+    def _teardown_request(self, exc=None):
+        # after_request 가 실행되지 않은 경우(처리되지 않은 예외)에도 in-flight 는 항상 감소
+        g.pop('_metrics', None)
+        self.in_flight.dec()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._statement_started.value = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(self._statement_started, 'value', None)
+        if started is None or not has_app_context():
+            return
+        state = g.get('_metrics')
+        if state is not None:
+            state['sql'] += 1
+            state['db_time'] += time.perf_counter() - started
+
+    # HashingService 리스너: bcrypt 연산 시간 기록
+    def observe_bcrypt(self, operation, duration):
+        self.bcrypt_duration.observe((operation,), duration)
+        if has_app_context():
+            state = g.get('_metrics')
+            if state is not None:
+                state['bcrypt_time'] += duration
@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, sqlite
+
+from background import DaemonLoop
+
+
+logger = logging.getLogger('flask_app')
+
+
+# 나이대 라벨 (출생 연도 기준 나이, 10세 단위)
+def age_band(birth_year, today=None):
+    age = (today or date.today()).year - birth_year
+    if age < 10:
+        return '10대 미만'
+    if age >= 70:
+        return '70대 이상'
+    return f'{age // 10 * 10}대'
+
+
+# (interests_id, gender, birth_year) -> 변화량 dict 에 사용자 1명의 관심분야 변화를 더함
+def add_deltas(deltas, gender, birth_date, interest_ids, amount):
+    for interests_id in interest_ids:
+        key = (interests_id, gender, birth_date.year)
+        deltas[key] = deltas.get(key, 0) + amount
+    return deltas
+
+
+# 관심분야 인기도 집계: interest_popularity 요약 테이블 + 프로세스 내 미러
+# 나이는 시간이 지나면 바뀌므로 요약 테이블은 (관심분야, 성별, 출생 연도) 별 사용자 수를 저장하고
+# 나이대는 조회 시점에 출생 연도로 계산한다.
+#   - record(): 사용자/관심분야를 바꾸는 트랜잭션 안에서 요약 테이블을 UPSERT 하고, 커밋되면 미러에 반영
+#   - 다른 워커 프로세스의 변경은 POPULARITY_REFRESH_INTERVAL 초마다 요약 테이블을 다시 읽어 반영
+#   - reconcile(): user ⋈ user_interests 로 처음부터 다시 집계해 요약 테이블과의 차이(drift)를 보고하고 교체
+# loader: 요약 테이블 행 (interests_id, gender, birth_year, user_count) 목록
+# aggregator: user ⋈ user_interests GROUP BY 결과 (interests_id, gender, birth_year, user_count) 목록
+class PopularityCounters:
+    def __init__(self, app=None, model=None, loader=None, aggregator=None):
+        self.refresh_interval = 30
+        self.reconcile_interval = 0
+        self._model = model
+        self._loader = loader
+        self._aggregator = aggregator
+        self._counts = None  # (interests_id, gender, birth_year) -> user_count
+        self._loaded_at = None
+        self._next_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._watching = False
+        self._reconciler = DaemonLoop('popularity-reconciler')
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.reconciliations = 0
+        self.drift_detected = 0
+        self.last_reconcile = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_interval = float(app.config.setdefault('POPULARITY_REFRESH_INTERVAL', 30))
+        self.reconcile_interval = float(app.config.setdefault('POPULARITY_RECONCILE_INTERVAL', 0))
+
+    # 요약 테이블 UPSERT (커밋은 호출 측 트랜잭션에서)
+    # 여러 트랜잭션이 같은 행을 갱신할 때 교착을 피하도록 항상 키 순서대로 기록
+    def record(self, session, deltas):
+        rows = [
+            {'interests_id': key[0], 'gender': key[1], 'birth_year': key[2], 'user_count': amount}
+            for key, amount in sorted(deltas.items())
+            if amount
+        ]
+        if not rows:
+            return
+        table = self._model.__table__
+        dialect = session.get_bind(self._model).dialect.name
+        if dialect == 'mysql':
+            stmt = mysql.insert(table).values(rows)
+            stmt = stmt.on_duplicate_key_update(user_count=table.c.user_count + stmt.inserted.user_count)
+        else:
+            stmt = sqlite.insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.interests_id, table.c.gender, table.c.birth_year],
+                set_={'user_count': table.c.user_count + stmt.excluded.user_count},
+            )
+        session.execute(stmt)
+
+        pending = session.info.setdefault('popularity_deltas', {})
+        for row in rows:
+            key = (row['interests_id'], row['gender'], row['birth_year'])
+            pending[key] = pending.get(key, 0) + row['user_count']
+
+    # 커밋되면 미러에 반영, 롤백되면 버림
+    def watch(self, session):
+        def after_commit(commit_session):
+            pending = commit_session.info.pop('popularity_deltas', None)
+            if pending:
+                self._apply(pending)
+
+        def after_soft_rollback(rollback_session, previous_transaction):
+            rollback_session.info.pop('popularity_deltas', None)
+
+        if self._watching:
+            return
+        event.listen(session, 'after_commit', after_commit)
+        event.listen(session, 'after_soft_rollback', after_soft_rollback)
+        self._watching = True
+
+    def _apply(self, deltas):
+        with self._write_lock:
+            if self._counts is None:
+                return
+            for key, amount in deltas.items():
+                count = self._counts.get(key, 0) + amount
+                if count:
+                    self._counts[key] = count
+                else:
+                    self._counts.pop(key, None)
+
+    def is_stale(self):
+        return self._counts is None or time.monotonic() >= self._next_refresh
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        try:
+            rows = self._loader()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        counts = {(row[0], row[1], row[2]): row[3] for row in rows if row[3]}
+        with self._write_lock:
+            self._counts = counts
+            self._loaded_at = time.time()
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        self.refreshes += 1
+
+    # 미러 사본 (만료되었으면 한 스레드만 다시 읽고, 나머지는 이전 값을 사용)
+    def counts(self):
+        if self.is_stale() and self._refresh_lock.acquire(blocking=self._counts is None):
+            try:
+                if self.is_stale():
+                    self._refresh_locked()
+            except Exception:
+                if self._counts is None:
+                    raise
+                self._next_refresh = time.monotonic() + self.refresh_interval
+            finally:
+                self._refresh_lock.release()
+        with self._write_lock:
+            return dict(self._counts)
+
+    # 처음부터 다시 집계해 요약 테이블과 비교하고, 차이가 있으면 집계 결과로 교체
+    # 요약 테이블 행을 먼저 잠가(FOR UPDATE) 집계 도중 커밋되는 증감이 사라지지 않게 함
+    def reconcile(self, session):
+        started = time.perf_counter()
+        model = self._model
+        stored = {
+            (row.interests_id, row.gender, row.birth_year): row.user_count
+            for row in session.query(model.interests_id, model.gender, model.birth_year, model.user_count).with_for_update()
+        }
+        actual = {(row[0], row[1], int(row[2])): row[3] for row in self._aggregator() if row[3]}
+
+        drift = []
+        for key in sorted(set(stored) | set(actual)):
+            if stored.get(key, 0) != actual.get(key, 0):
+                drift.append({
+                    'interests_id': key[0],
+                    'gender': key[1],
+                    'birth_year': key[2],
+                    'stored': stored.get(key, 0),
+                    'actual': actual.get(key, 0),
+                })
+
+        if drift:
+            session.query(model).delete(synchronize_session=False)
+            if actual:
+                session.execute(model.__table__.insert(), [
+                    {'interests_id': key[0], 'gender': key[1], 'birth_year': key[2], 'user_count': count}
+                    for key, count in sorted(actual.items())
+                ])
+        session.info.pop('popularity_deltas', None)
+        session.commit()
+
+        with self._write_lock:
+            self._counts = dict(actual)
+            self._loaded_at = time.time()
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        self.reconciliations += 1
+        self.drift_detected += len(drift)
+        self.last_reconcile = {
+            'at': time.time(),
+            'rows': len(actual),
+            'drift_count': len(drift),
+            'duration': time.perf_counter() - started,
+        }
+        if drift:
+            logger.warning('관심분야 인기도 집계 불일치 수정', extra={'drift_count': len(drift), 'drift': drift[:20]})
+        return dict(self.last_reconcile, drift=drift)
+
+    # POPULARITY_RECONCILE_INTERVAL 초마다 reconcile 을 실행하는 백그라운드 스레드 (0 이면 사용 안 함)
+    # 워커 프로세스마다 시작되므로 워커가 많으면 주기를 길게 두거나 CLI(reconcile-popularity)를 cron 으로 실행
+    def start_reconciler(self, app, session):
+        if self.reconcile_interval <= 0:
+            return
+
+        def on_error(e):
+            session.rollback()
+            logger.error(f'관심분야 인기도 재집계 중 오류 발생: {e}')
+
+        self._reconciler.start(lambda: self.reconcile(session), lambda: self.reconcile_interval, on_error, app=app)
+
+    def stats(self):
+        counts = self._counts
+        return {
+            'loaded': counts is not None,
+            'rows': len(counts) if counts is not None else 0,
+            'loaded_at': self._loaded_at,
+            'refresh_interval': self.refresh_interval,
+            'reconcile_interval': self.reconcile_interval,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'reconciliations': self.reconciliations,
+            'drift_detected': self.drift_detected,
+            'last_reconcile': self.last_reconcile,
+        }
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# token_required 에서 사용하는 사용자(principal) 캐시
+# user_id -> 사용자 컬럼 스냅샷(dict) 을 TTL 과 LRU 상한을 두고 프로세스 내에 보관한다.
+# ORM 객체는 세션에 묶여 있으므로 컬럼 값만 저장하고, 조회 시 호출 측에서 세션에 다시 붙인다.
+class PrincipalCache:
+    def __init__(self, app=None, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (만료 시각, 컬럼 스냅샷)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maxsize = int(app.config.setdefault('PRINCIPAL_CACHE_SIZE', self.maxsize))
+        self.ttl = float(app.config.setdefault('PRINCIPAL_CACHE_TTL', self.ttl))
+        self.clear()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def set(self, user_id, snapshot):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[user_id] = (expires_at, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
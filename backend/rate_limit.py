@@ -0,0 +1,192 @@
+import json
+import logging
+import math
+import threading
+import time
+import zlib
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+
+logger = logging.getLogger('flask_app')
+
+
+# 저장소 인터페이스: 여러 워커/서버가 한도를 공유하려면 같은 메서드를 가진 공유 저장소(예: Redis)로 교체
+class RateLimitBackend:
+    # key 에 대한 시도 1회를 기록하고 (허용 여부, 재시도까지 남은 초) 반환 (거부된 시도는 기록하지 않음)
+    def hit(self, key, limit, window, now=None):
+        raise NotImplementedError
+
+    def reset(self, key):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+# 프로세스 내 슬라이딩 윈도우 카운터 저장소
+# 키마다 [현재 윈도우 시작 시각, 현재 윈도우 횟수, 직전 윈도우 횟수] 만 저장하고,
+# 직전 윈도우 횟수를 경과 비율만큼 줄여 더하는 방식으로 슬라이딩 윈도우 횟수를 근사한다.
+# 키를 해시해 샤드별로 락을 나누고, 만료된 키는 샤드마다 일정 횟수 기록할 때 정리한다.
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, shards=16, max_keys_per_shard=10000, sweep_every=1000):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+        self.sweep_every = sweep_every
+        self._ops = [0] * shards
+        self.evictions = 0
+
+    def _shard(self, key):
+        index = zlib.crc32(key.encode('utf-8')) % len(self._shards)
+        return index, self._shards[index]
+
+    def hit(self, key, limit, window, now=None):
+        now = time.monotonic() if now is None else now
+        index, (entries, lock) = self._shard(key)
+        with lock:
+            self._ops[index] += 1
+            if self._ops[index] % self.sweep_every == 0 or len(entries) >= self.max_keys_per_shard:
+                self._sweep(entries, now)
+
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = [now, 0, 0, window]
+            start, current, previous = entry[0], entry[1], entry[2]
+            elapsed = now - start
+            if elapsed >= window:
+                # 한 윈도우 이상 지났으면 현재 윈도우를 직전 윈도우로 넘김 (두 윈도우 이상이면 모두 만료)
+                windows = int(elapsed // window)
+                previous = current if windows == 1 else 0
+                current = 0
+                start += windows * window
+                elapsed = now - start
+
+            weight = 1 - elapsed / window
+            if previous * weight + current + 1 > limit:
+                entry[0], entry[1], entry[2] = start, current, previous
+                return False, self._retry_after(limit, window, elapsed, current, previous)
+
+            entry[0], entry[1], entry[2] = start, current + 1, previous
+            return True, 0
+
+    @staticmethod
+    def _retry_after(limit, window, elapsed, current, previous):
+        if current + 1 > limit:
+            # 다음 윈도우에서 현재 횟수가 직전 횟수로 넘어간 뒤 충분히 줄어들 때까지
+            wait = window - elapsed
+            if current:
+                wait += window * max(0.0, 1 - (limit - 1) / current)
+        else:
+            # 직전 윈도우 횟수의 가중치가 충분히 줄어들 때까지
+            wait = window * (1 - (limit - 1 - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+    def _sweep(self, entries, now):
+        # 두 윈도우 이상 지난 키는 더 이상 한도에 영향이 없으므로 삭제
+        expired = [key for key, entry in entries.items() if now - entry[0] >= 2 * entry[3]]
+        for key in expired:
+            del entries[key]
+        if len(entries) >= self.max_keys_per_shard:
+            # 그래도 가득 차면 가장 오래된 키부터 절반 삭제
+            oldest = sorted(entries, key=lambda key: entries[key][0])[:len(entries) // 2]
+            for key in oldest:
+                del entries[key]
+            self.evictions += len(oldest)
+
+    def reset(self, key):
+        _, (entries, lock) = self._shard(key)
+        with lock:
+            entries.pop(key, None)
+
+    def stats(self):
+        keys = 0
+        for entries, lock in self._shards:
+            with lock:
+                keys += len(entries)
+        return {'backend': 'memory', 'shards': len(self._shards), 'keys': keys, 'evictions': self.evictions}
+
+
+# 한도 키 추출 함수: 값이 없으면(None) 해당 규칙은 건너뜀
+def client_ip():
+    if current_app.config['RATE_LIMIT_TRUST_PROXY']:
+        forwarded = request.headers.get('X-Forwarded-For', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.remote_addr
+
+
+def json_username():
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+def current_user_id():
+    user = g.get('user')
+    return str(user.user_id) if user is not None else None
+
+
+KEY_FUNCS = {
+    'ip': client_ip,
+    'username': json_username,
+    'user': current_user_id,
+}
+
+
+# 라우트별 슬라이딩 윈도우 한도
+# RATE_LIMITS = {이름: [{'key': 'ip'|'username'|'user', 'limit': 횟수, 'window': 초}, ...]}
+# 한도를 넘으면 핸들러(DB 조회, bcrypt)를 실행하지 않고 429 + Retry-After 로 응답
+class RateLimiter:
+    def __init__(self, app=None, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.enabled = True
+        self.rules = {}
+        self.allowed = 0
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.setdefault('RATE_LIMIT_ENABLED', True))
+        app.config.setdefault('RATE_LIMIT_TRUST_PROXY', False)
+        rules = app.config.setdefault('RATE_LIMITS', {})
+        if isinstance(rules, str):
+            rules = json.loads(rules)
+        for name, name_rules in rules.items():
+            for rule in name_rules:
+                if rule['key'] not in KEY_FUNCS:
+                    raise ValueError(f'알 수 없는 rate limit key: {rule["key"]}')
+        self.rules = rules
+
+    def check(self, name):
+        for rule in self.rules.get(name, ()):
+            value = KEY_FUNCS[rule['key']]()
+            if value is None:
+                continue
+            allowed, retry_after = self.backend.hit(
+                f'{name}:{rule["key"]}:{value}', int(rule['limit']), float(rule['window'])
+            )
+            if not allowed:
+                self.rejected += 1
+                return rule, retry_after
+        self.allowed += 1
+        return None, 0
+
+    def limit(self, name):
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if self.enabled:
+                    rule, retry_after = self.check(name)
+                    if rule is not None:
+                        logger.warning('요청 한도 초과', extra={'rate_limit': name, 'rate_limit_key': rule['key'], 'retry_after': retry_after})
+                        response = jsonify({'error': '요청이 너무 많습니다. 잠시 후 다시 시도해주세요.'})
+                        response.headers['Retry-After'] = str(retry_after)
+                        return response, 429
+                return f(*args, **kwargs)
+            return decorated
+        return decorator
+
+    def stats(self):
+        return dict(self.backend.stats(), enabled=self.enabled, allowed=self.allowed, rejected=self.rejected)
@@ -0,0 +1,161 @@
+import heapq
+
+from snapshot_index import SnapshotIndex
+
+
+# 관심분야 -> 영양제 역색인
+# 시작 시 supplements / supplement_interests 전체를 읽어 만들고, 이후에는
+#   - ORM 으로 Supplement / SupplementInterest 를 추가/수정/삭제하면 커밋 시점에 해당 항목만 반영하고
+#   - 일괄 쿼리처럼 ORM 이벤트가 발생하지 않는 변경은 RECOMMENDATION_INDEX_REFRESH_INTERVAL 초마다 전체 재구성으로 반영한다.
+# 재구성/교체/변경 반영 순서는 SnapshotIndex 참고
+# loader 는 (영양제 행 목록, (supplements_id, interests_id) 매핑 행 목록) 을 반환하는 함수 (앱 컨텍스트 안에서 호출됨)
+class RecommendationIndex(SnapshotIndex):
+    label = '영양제 추천 색인'
+    changes_key = 'recommendation_changes'
+
+    def __init__(self, app=None, loader=None):
+        super().__init__(600, loader, thread_name='recommendation-index-refresher')
+        self._supplements = None             # supplements_id -> 영양제 dict
+        self._by_interest = {}               # interests_id -> frozenset(supplements_id)
+        self._interests_by_supplement = {}   # supplements_id -> frozenset(interests_id)
+        self._supplement_model = None
+        self._mapping_model = None
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app, loader=None):
+        self.refresh_interval = float(app.config.setdefault('RECOMMENDATION_INDEX_REFRESH_INTERVAL', 600))
+        app.config.setdefault('RECOMMENDATION_DEFAULT_LIMIT', 20)
+        app.config.setdefault('RECOMMENDATION_MAX_LIMIT', 100)
+        if loader is not None:
+            self._loader = loader
+
+    def _build(self, rows):
+        supplement_rows, mapping_rows = rows
+        supplements = {row[0]: _supplement_dict(row) for row in supplement_rows}
+        by_interest = {}
+        by_supplement = {}
+        for supplements_id, interests_id in mapping_rows:
+            by_interest.setdefault(interests_id, set()).add(supplements_id)
+            by_supplement.setdefault(supplements_id, set()).add(interests_id)
+
+        by_interest = {k: frozenset(v) for k, v in by_interest.items()}
+        by_supplement = {k: frozenset(v) for k, v in by_supplement.items()}
+        return supplements, by_interest, by_supplement
+
+    def _swap(self, state):
+        self._supplements, self._by_interest, self._interests_by_supplement = state
+
+    # 커밋된 변경 (upserts: 영양제 dict 목록, deletes: supplements_id 목록, added/removed: (supplements_id, interests_id) 목록)
+    def _apply_locked(self, upserts, deletes, added, removed):
+        for supplement in upserts:
+            self._supplements[supplement['supplements_id']] = supplement
+        for supplements_id, interests_id in removed:
+            self._unlink(supplements_id, interests_id)
+        for supplements_id, interests_id in added:
+            self._link(supplements_id, interests_id)
+        for supplements_id in deletes:
+            # DB 에서는 ON DELETE CASCADE 로 매핑도 함께 삭제됨
+            for interests_id in self._interests_by_supplement.get(supplements_id, ()):
+                self._unlink(supplements_id, interests_id)
+            self._supplements.pop(supplements_id, None)
+
+    # 항목마다 새 frozenset 으로 교체하므로 읽는 쪽은 락 없이 일관된 목록을 봄
+    def _link(self, supplements_id, interests_id):
+        self._by_interest[interests_id] = self._by_interest.get(interests_id, frozenset()) | {supplements_id}
+        self._interests_by_supplement[supplements_id] = (
+            self._interests_by_supplement.get(supplements_id, frozenset()) | {interests_id}
+        )
+
+    def _unlink(self, supplements_id, interests_id):
+        remaining = self._by_interest.get(interests_id, frozenset()) - {supplements_id}
+        if remaining:
+            self._by_interest[interests_id] = remaining
+        else:
+            self._by_interest.pop(interests_id, None)
+        interests = self._interests_by_supplement.get(supplements_id, frozenset()) - {interests_id}
+        if interests:
+            self._interests_by_supplement[supplements_id] = interests
+        else:
+            self._interests_by_supplement.pop(supplements_id, None)
+
+    # 사용자의 관심분야를 많이 포함하는 순(같으면 supplements_id 순)으로 상위 limit 개
+    def recommend(self, interest_ids, limit=20, offset=0):
+        self._check_loaded()
+        supplements = self._supplements
+        by_interest = self._by_interest
+
+        matched = {}
+        for interests_id in interest_ids:
+            for supplements_id in by_interest.get(interests_id, ()):
+                matched.setdefault(supplements_id, []).append(interests_id)
+
+        ranked = heapq.nsmallest(
+            offset + limit, matched.items(), key=lambda item: (-len(item[1]), item[0])
+        )[offset:]
+        results = []
+        for supplements_id, interests in ranked:
+            supplement = supplements.get(supplements_id)
+            if supplement is None:
+                continue
+            results.append(dict(supplement, score=len(interests), matched_interests=interests))
+        return results, len(matched)
+
+    # 주어진 관심분야 중 하나 이상에 매핑된 supplements_id 집합 (검색 필터용)
+    def supplement_ids_for(self, interest_ids):
+        self._check_loaded()
+        by_interest = self._by_interest
+        result = set()
+        for interests_id in interest_ids:
+            result |= by_interest.get(interests_id, frozenset())
+        return result
+
+    # Supplement / SupplementInterest ORM 변경을 flush 시점에 모아 두었다가 커밋 후 반영
+    def watch(self, session, supplement_model, mapping_model):
+        self._supplement_model = supplement_model
+        self._mapping_model = mapping_model
+        self._listen(session)
+
+    def _empty_changes(self):
+        return [], [], [], []
+
+    def _collect(self, flush_session, changes):
+        upserts, deletes, added, removed = changes
+        for obj in flush_session.new:
+            if isinstance(obj, self._supplement_model):
+                upserts.append(_supplement_dict(obj))
+            elif isinstance(obj, self._mapping_model):
+                added.append((obj.supplements_id, obj.interests_id))
+        for obj in flush_session.dirty:
+            if isinstance(obj, self._supplement_model):
+                upserts.append(_supplement_dict(obj))
+            elif isinstance(obj, self._mapping_model):
+                # 매핑 행 자체를 수정한 경우 이전 값을 알 수 없으므로 전체 재구성
+                self.mark_stale()
+        for obj in flush_session.deleted:
+            if isinstance(obj, self._supplement_model):
+                deletes.append(obj.supplements_id)
+            elif isinstance(obj, self._mapping_model):
+                removed.append((obj.supplements_id, obj.interests_id))
+
+    def stats(self):
+        supplements = self._supplements
+        stats = super().stats()
+        stats.update({
+            'supplements': len(supplements) if supplements is not None else 0,
+            'interests': len(self._by_interest),
+            'mappings': sum(len(ids) for ids in list(self._by_interest.values())),
+        })
+        return stats
+
+
+def _supplement_dict(source):
+    if isinstance(source, tuple) or hasattr(source, '_fields'):
+        supplements_id, name, description = source[0], source[1], source[2]
+    else:
+        supplements_id, name, description = source.supplements_id, source.supplement_name, source.supplement_description
+    return {
+        'supplements_id': supplements_id,
+        'supplement_name': name,
+        'supplement_description': description,
+    }
@@ -0,0 +1,169 @@
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import event
+
+from background import DaemonLoop
+
+
+logger = logging.getLogger('flask_app')
+
+
+# 색인이 아직 한 번도 구성되지 않은 경우 (시작 시 DB 미준비 등, 구성은 백그라운드 스레드가 재시도)
+class IndexNotReadyError(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# DB 테이블 전체를 읽어 만든 메모리 색인의 공통 갱신 로직 (RecommendationIndex, SupplementSearchIndex)
+#   - 처음 구성과 전체 재구성은 start_refresher 의 백그라운드 스레드에서만 실행하고(요청 경로에서는 재구성하지 않음),
+#     새 색인을 다 만든 뒤 교체하며 그 사이 커밋된 변경은 새 색인에 다시 적용한다.
+#   - ORM 변경은 flush 시점에 session.info[changes_key] 에 모아 두었다가 커밋 후 그 항목만 반영한다.
+# 하위 클래스가 구현할 것:
+#   _build(rows) -> 새 색인 상태, _swap(state) -> 새 상태로 교체 (쓰기 락 안에서 호출),
+#   _empty_changes() / _collect(flush_session, changes) -> flush 된 변경 수집, _apply_locked(*changes) -> 변경 반영
+class SnapshotIndex:
+    label = '색인'
+    changes_key = None
+
+    def __init__(self, refresh_interval, loader=None, thread_name='index-refresher'):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = 30
+        self.initial_retry_interval = 1
+        self._retry_delay = self.initial_retry_interval
+        self._loader = loader
+        self._loaded_at = None
+        self._next_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = None   # 재구성 중 커밋된 변경 (새 색인에 다시 적용)
+        self._stale_marks = 0
+        self._refresher = DaemonLoop(thread_name)
+        self._watching = False
+        self.rebuilds = 0
+        self.rebuild_errors = 0
+        self.incremental_updates = 0
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def is_stale(self):
+        return not self.loaded or time.monotonic() >= self._next_refresh
+
+    # 다음 재구성을 앞당김 (백그라운드 스레드를 깨워 바로 재구성)
+    def mark_stale(self):
+        self._stale_marks += 1
+        self._next_refresh = 0.0
+        self._refresher.wake()
+
+    def _check_loaded(self):
+        if not self.loaded:
+            # 다음 구성 시도까지 남은 시간 (구성 중이면 1초)
+            retry_after = max(math.ceil(self._next_refresh - time.monotonic()), 1)
+            raise IndexNotReadyError(f'{self.label}을 준비 중입니다. 잠시 후 다시 시도해주세요.', retry_after)
+
+    def rebuild(self):
+        with self._refresh_lock:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self):
+        marks = self._stale_marks
+        with self._write_lock:
+            self._pending = []
+        try:
+            rows = self._loader()
+        except Exception:
+            with self._write_lock:
+                self._pending = None
+            self.rebuild_errors += 1
+            raise
+        state = self._build(rows)
+
+        with self._write_lock:
+            # 읽는 쪽은 속성 참조만 하므로 새 dict 로 통째로 교체
+            self._swap(state)
+            self._loaded_at = time.time()
+            # 행을 읽은 뒤 커밋된 변경은 새 색인에 빠져 있을 수 있으므로 다시 적용 (같은 변경을 두 번 적용해도 결과는 같음)
+            pending, self._pending = self._pending, None
+            for changes in pending:
+                self._apply_locked(*changes)
+        if self._stale_marks != marks:
+            # 재구성 중에 다시 요청되었으면 (예: 매핑 행 수정) 바로 한 번 더
+            self._next_refresh = 0.0
+        elif self.refresh_interval > 0:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        else:
+            self._next_refresh = float('inf')
+        self._retry_delay = self.initial_retry_interval
+        self.rebuilds += 1
+
+    # 구성/전체 재구성 백그라운드 스레드 (시작 직후 한 번, 이후 refresh_interval 마다, 또는 mark_stale 로 요청되었을 때)
+    def start_refresher(self, app):
+        def until_next_refresh():
+            delay = self._next_refresh - time.monotonic()
+            return delay if delay != float('inf') else None
+
+        def refresh():
+            if self.is_stale():
+                self.rebuild()
+
+        def on_error(e):
+            if self.loaded:
+                # 이전 색인이 있으면 그대로 제공하고 잠시 후 다시 시도
+                delay = self.retry_interval
+            else:
+                # 아직 구성되지 않았으면 요청이 503 을 받는 중이므로 1초부터 두 배씩 retry_interval 까지 늘려 재시도
+                delay = self._retry_delay
+                self._retry_delay = min(delay * 2, self.retry_interval)
+            self._next_refresh = time.monotonic() + delay
+            logger.error(f'{self.label} 재구성 중 오류 발생 ({delay:g}초 후 재시도): {e}')
+
+        # 이미 도는 중이면 (create_app 재호출) 앱마다 DB 가 다를 수 있으므로 새 앱으로 바로 다시 구성
+        restart = self._refresher.running
+        self._refresher.start(refresh, until_next_refresh, on_error, app=app)
+        if restart:
+            self.mark_stale()
+
+    # 커밋된 변경만 반영 (재구성 중이면 새 색인에 다시 적용하도록 보관)
+    def apply(self, *changes):
+        with self._write_lock:
+            if self._pending is not None:
+                self._pending.append(changes)
+            if not self.loaded:
+                return
+            self._apply_locked(*changes)
+            self.incremental_updates += 1
+
+    # ORM 변경을 flush 시점에 모아 두었다가 커밋 후 반영 (create_app 이 여러 번 호출되어도 리스너는 한 번만 등록)
+    def _listen(self, session):
+        def after_flush(flush_session, flush_context):
+            self._collect(flush_session, flush_session.info.setdefault(self.changes_key, self._empty_changes()))
+
+        def after_commit(commit_session):
+            changes = commit_session.info.pop(self.changes_key, None)
+            if changes and any(changes):
+                self.apply(*changes)
+
+        def after_soft_rollback(rollback_session, previous_transaction):
+            rollback_session.info.pop(self.changes_key, None)
+
+        if self._watching:
+            return
+        event.listen(session, 'after_flush', after_flush)
+        event.listen(session, 'after_commit', after_commit)
+        event.listen(session, 'after_soft_rollback', after_soft_rollback)
+        self._watching = True
+
+    def stats(self):
+        return {
+            'loaded': self.loaded,
+            'loaded_at': self._loaded_at,
+            'refresh_interval': self.refresh_interval,
+            'rebuilds': self.rebuilds,
+            'rebuild_errors': self.rebuild_errors,
+            'incremental_updates': self.incremental_updates,
+        }
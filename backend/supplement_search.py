@@ -0,0 +1,277 @@
+import heapq
+import unicodedata
+
+from snapshot_index import SnapshotIndex
+
+
+# 한글 음절의 초성 (유니코드 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성)
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSEONG_SET = frozenset(CHOSEONG)
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+
+# 검색용 정규화: NFC 로 합쳐(자모가 분리된 NFD 입력 대응) 소문자화하고 공백 기준으로 단어 분리
+def normalize(text):
+    return unicodedata.normalize('NFC', text or '').casefold().split()
+
+
+def to_choseong(word):
+    chars = []
+    for ch in word:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            chars.append(CHOSEONG[(code - _HANGUL_FIRST) // 588])
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def is_choseong_query(words):
+    return bool(words) and all(ch in _CHOSEONG_SET for word in words for ch in word)
+
+
+# 단어의 글자 단위 n-gram: 한 글자(unigram) + 두 글자(bigram)
+def grams(word):
+    result = set(word)
+    result.update(word[i:i + 2] for i in range(len(word) - 1))
+    return result
+
+
+# 질의 단어를 찾는 데 필요한 gram: 두 글자 이상이면 bigram 만, 한 글자면 unigram
+def query_grams(word):
+    if len(word) == 1:
+        return {word}
+    return {word[i:i + 2] for i in range(len(word) - 1)}
+
+
+# supplements.supplement_name / supplement_description 대상 n-gram 역색인
+# gram -> frozenset(supplements_id) 를 이름/설명 공용으로, 초성 gram 은 이름만 따로 보관한다.
+# 질의의 모든 gram 을 포함하는 후보를 교집합으로 구한 뒤 실제 부분 문자열 포함 여부로 확인하고 순위를 매긴다.
+# 갱신 방식은 RecommendationIndex 와 같음 (SnapshotIndex: 시작 시 전체 구성, ORM 변경은 커밋 후 반영,
+# 주기적 전체 재구성은 백그라운드 스레드에서 새 색인을 만든 뒤 교체)
+# loader 는 (supplements_id, supplement_name, supplement_description) 행 목록을 반환하는 함수
+class SupplementSearchIndex(SnapshotIndex):
+    label = '영양제 검색 색인'
+    changes_key = 'supplement_search_changes'
+
+    def __init__(self, app=None, loader=None):
+        super().__init__(1800, loader, thread_name='supplement-search-refresher')
+        self._docs = None      # supplements_id -> 문서 dict
+        self._postings = {}    # gram -> frozenset(supplements_id)
+        self._choseong = {}    # 초성 gram -> frozenset(supplements_id)
+        self._supplement_model = None
+        self.queries = 0
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app, loader=None):
+        self.refresh_interval = float(app.config.setdefault('SUPPLEMENT_SEARCH_REFRESH_INTERVAL', 1800))
+        app.config.setdefault('SUPPLEMENT_SEARCH_DEFAULT_LIMIT', 20)
+        app.config.setdefault('SUPPLEMENT_SEARCH_MAX_LIMIT', 100)
+        app.config.setdefault('SUPPLEMENT_SEARCH_MAX_QUERY_LENGTH', 50)
+        if loader is not None:
+            self._loader = loader
+
+    def _build(self, rows):
+        docs = {}
+        postings = {}
+        choseong = {}
+        for row in rows:
+            doc = _make_doc(row[0], row[1], row[2])
+            docs[row[0]] = doc
+            doc_grams, choseong_grams = _doc_grams(doc)
+            for gram in doc_grams:
+                postings.setdefault(gram, set()).add(row[0])
+            for gram in choseong_grams:
+                choseong.setdefault(gram, set()).add(row[0])
+
+        postings = {k: frozenset(v) for k, v in postings.items()}
+        choseong = {k: frozenset(v) for k, v in choseong.items()}
+        return docs, postings, choseong
+
+    def _swap(self, state):
+        self._docs, self._postings, self._choseong = state
+
+    # 커밋된 영양제 추가/수정(upserts: (id, 이름, 설명) 목록)과 삭제(deletes: id 목록)
+    # 바뀐 gram 의 posting 만 새 frozenset 으로 교체하므로 읽는 쪽은 락 없이 일관된 목록을 봄
+    def _apply_locked(self, upserts, deletes):
+        for supplements_id in deletes:
+            self._remove(supplements_id)
+        for supplements_id, name, description in upserts:
+            self._remove(supplements_id)
+            doc = _make_doc(supplements_id, name, description)
+            doc_grams, choseong_grams = _doc_grams(doc)
+            for gram in doc_grams:
+                self._postings[gram] = self._postings.get(gram, frozenset()) | {supplements_id}
+            for gram in choseong_grams:
+                self._choseong[gram] = self._choseong.get(gram, frozenset()) | {supplements_id}
+            self._docs[supplements_id] = doc
+
+    def _remove(self, supplements_id):
+        doc = self._docs.pop(supplements_id, None)
+        if doc is None:
+            return
+        doc_grams, choseong_grams = _doc_grams(doc)
+        for postings, removed_grams in ((self._postings, doc_grams), (self._choseong, choseong_grams)):
+            for gram in removed_grams:
+                remaining = postings.get(gram, frozenset()) - {supplements_id}
+                if remaining:
+                    postings[gram] = remaining
+                else:
+                    postings.pop(gram, None)
+
+    # query 를 포함하는 영양제를 순위대로 반환 (결과 목록, 전체 일치 수)
+    # choseong: None 이면 질의가 초성(ㄱ~ㅎ)으로만 이루어졌을 때 초성 검색, True/False 로 강제 가능
+    # allowed_ids: 주어지면 이 집합에 속한 영양제만 (관심분야 필터)
+    def search(self, query, limit=20, offset=0, choseong=None, allowed_ids=None):
+        self._check_loaded()
+        self.queries += 1
+        words = normalize(query)
+        if not words:
+            return [], 0
+        if choseong is None:
+            choseong = is_choseong_query(words)
+
+        docs = self._docs
+        postings = self._choseong if choseong else self._postings
+        needed = set()
+        for word in words:
+            needed |= query_grams(word)
+        candidates = _intersect([postings.get(gram) for gram in needed], allowed_ids)
+
+        rank = _choseong_rank if choseong else _rank
+        query_text = ' '.join(words)
+        ranked = []
+        for supplements_id in candidates:
+            doc = docs.get(supplements_id)
+            if doc is None:
+                continue
+            key = rank(doc, words, query_text)
+            if key is not None:
+                ranked.append(key)
+
+        results = []
+        for key in heapq.nsmallest(offset + limit, ranked)[offset:]:
+            doc = docs.get(_unpack_id(key))
+            if doc is None:
+                continue
+            results.append({
+                'supplements_id': doc['supplements_id'],
+                'supplement_name': doc['name'],
+                'supplement_description': doc['description'],
+            })
+        return results, len(ranked)
+
+    # Supplement ORM 변경을 flush 시점에 모아 두었다가 커밋 후 반영
+    def watch(self, session, supplement_model):
+        self._supplement_model = supplement_model
+        self._listen(session)
+
+    def _empty_changes(self):
+        return [], []
+
+    def _collect(self, flush_session, changes):
+        upserts, deletes = changes
+        for obj in list(flush_session.new) + list(flush_session.dirty):
+            if isinstance(obj, self._supplement_model):
+                upserts.append((obj.supplements_id, obj.supplement_name, obj.supplement_description))
+        for obj in flush_session.deleted:
+            if isinstance(obj, self._supplement_model):
+                deletes.append(obj.supplements_id)
+
+    def stats(self):
+        docs = self._docs
+        stats = super().stats()
+        stats.update({
+            'documents': len(docs) if docs is not None else 0,
+            'grams': len(self._postings),
+            'choseong_grams': len(self._choseong),
+            'queries': self.queries,
+        })
+        return stats
+
+
+# 응답용 원문과 비교용 정규화 문자열만 보관 (gram 은 색인 갱신 때 다시 계산)
+def _make_doc(supplements_id, name, description):
+    name_words = normalize(name)
+    name_text = ' '.join(name_words)
+    return {
+        'supplements_id': supplements_id,
+        'name': name,
+        'description': description,
+        'order': _order(name_text, supplements_id),
+        'name_text': name_text,
+        'description_text': ' '.join(normalize(description)),
+        'choseong_name': ' '.join(to_choseong(word) for word in name_words),
+    }
+
+
+def _doc_grams(doc):
+    doc_grams = set()
+    for word in (doc['name_text'] + ' ' + doc['description_text']).split():
+        doc_grams |= grams(word)
+    choseong_grams = set()
+    for word in doc['choseong_name'].split():
+        choseong_grams |= grams(word)
+    return doc_grams, choseong_grams
+
+
+# 작은 posting 부터 교집합 (gram 하나라도 없으면 결과 없음)
+def _intersect(posting_lists, allowed_ids=None):
+    if any(posting is None for posting in posting_lists):
+        return frozenset()
+    ordered = sorted(posting_lists, key=len)
+    if allowed_ids is not None:
+        ordered.insert(0, allowed_ids)
+        ordered.sort(key=len)
+    result = set(ordered[0])
+    for posting in ordered[1:]:
+        result &= posting
+        if not result:
+            break
+    return result
+
+
+# 순위 키 (작을수록 앞): 이름 완전 일치 < 이름 접두 일치 < 모든 단어가 이름에 < 일부만 이름에 < 설명에만
+# 같은 등급이면 이름에서 더 앞에 나오고 이름이 짧은 영양제, 그다음 supplements_id 순
+# 후보가 수만 개일 때 튜플을 만들면 GC 대상 객체가 쌓이므로 (등급, 위치, 길이, id) 를 정수 하나로 합침
+# (길이, id) 부분은 문서마다 고정이므로 미리 계산해 둔 doc['order'] 를 사용
+def _order(name_text, supplements_id):
+    return min(len(name_text), 0xFFFF) << 64 | supplements_id
+
+
+def _unpack_id(key):
+    return key & 0xFFFFFFFFFFFFFFFF
+
+
+# 단어 중 하나라도 이름/설명 어디에도 없으면 None (bigram 교집합의 오탐 제거)
+def _rank(doc, words, query_text):
+    name_text = doc['name_text']
+    in_name = 0
+    for word in words:
+        if word in name_text:
+            in_name += 1
+        elif word not in doc['description_text']:
+            return None
+
+    if name_text == query_text:
+        tier = 0
+    elif name_text.startswith(query_text):
+        tier = 1
+    elif in_name == len(words):
+        tier = 2
+    elif in_name:
+        tier = 3
+    else:
+        tier = 4
+    position = name_text.find(words[0])
+    if position < 0:
+        position = 0xFFFF
+    return (tier << 16 | min(position, 0xFFFF)) << 80 | doc['order']
+
+
+def _choseong_rank(doc, words, query_text):
+    position = doc['choseong_name'].find(query_text)
+    if position < 0:
+        return None
+    return ((1 if position else 0) << 16 | min(position, 0xFFFF)) << 80 | doc['order']
@@ -0,0 +1,115 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as heal  # noqa: E402
+
+
+CATEGORIES = ['간 건강', '피로 개선', '눈 건강', '관절/뼈 건강', '면역력 강화']
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp('db') / 'heal.db'
+    flask_app = heal.create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SECRET_KEY': 'test-secret-key-test-secret-key!!',
+        'BCRYPT_LOG_ROUNDS': 4,
+        'LOGSTASH_HOST': '127.0.0.1',
+        'LOGSTASH_PORT': 1,
+    })
+    with flask_app.app_context():
+        heal.db.create_all()
+        heal.db.session.add_all([heal.Interest(category=category) for category in CATEGORIES])
+        user = heal.User(
+            username='interest_user', password='unused', name='관심', gender='female', birth_date=date(1995, 5, 5),
+        )
+        heal.db.session.add(user)
+        heal.db.session.flush()
+        heal.replace_user_interests(user.user_id, [3, 1, 5, 2], current_ids=set())
+        heal.db.session.commit()
+        heal.interest_catalog.refresh()
+    yield flask_app
+    with flask_app.app_context():
+        heal.db.session.remove()
+        heal.db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with app.app_context():
+        user = heal.User.query.filter_by(username='interest_user').one()
+        client.set_cookie('token', heal.issue_token(user.user_id))
+    return client
+
+
+def test_get_user_interests_issues_single_select(app, client):
+    # 첫 요청으로 사용자 캐시를 채운 뒤에는 관심분야 조회 한 번만 실행되어야 함
+    assert client.get('/users/me').status_code == 200
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = heal.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/users/me/interests')
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['interests_id'] for item in body['interests']] == [3, 1, 5, 2]
+    assert [item['category'] for item in body['interests']] == [CATEGORIES[2], CATEGORIES[0], CATEGORIES[4], CATEGORIES[1]]
+
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith('SELECT')]
+    assert len(selects) == 1, statements
+
+
+def test_user_interest_unique_constraint_rejects_duplicate(app):
+    with app.app_context():
+        user = heal.User.query.filter_by(username='interest_user').one()
+        heal.db.session.add(heal.UserInterest(user_id=user.user_id, interests_id=3))
+        with pytest.raises(IntegrityError) as excinfo:
+            heal.db.session.commit()
+        heal.db.session.rollback()
+        assert 'user_interests' in str(excinfo.value)
+
+
+def test_add_user_interests_retries_after_concurrent_insert(app, client, monkeypatch):
+    original = heal.replace_user_interests
+    calls = []
+
+    def racing_replace(user_id, interest_ids, current_ids=None):
+        current_ids = {
+            row.interests_id
+            for row in heal.db.session.query(heal.UserInterest.interests_id).filter_by(user_id=user_id)
+        }
+        if not calls:
+            # 현재 목록을 읽은 뒤 같은 사용자의 다른 요청이 같은 관심분야를 먼저 추가해 커밋한 상황
+            with heal.db.engine.begin() as conn:
+                conn.execute(insert(heal.UserInterest), [{'user_id': user_id, 'interests_id': 4}])
+        calls.append(current_ids)
+        return original(user_id, interest_ids, current_ids)
+
+    monkeypatch.setattr(heal, 'replace_user_interests', racing_replace)
+    response = client.post('/users/me/interests', json={'interests': [3, 1, 5, 2, 4]})
+
+    assert response.status_code == 201, response.get_json()
+    assert len(calls) == 2
+    assert 4 in calls[1]
+    with app.app_context():
+        user = heal.User.query.filter_by(username='interest_user').one()
+        rows = heal.UserInterest.query.filter_by(user_id=user.user_id).all()
+        assert sorted(row.interests_id for row in rows) == [1, 2, 3, 4, 5]
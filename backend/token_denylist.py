@@ -0,0 +1,364 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import event
+
+from background import DaemonLoop
+
+
+logger = logging.getLogger('flask_app')
+
+
+# 저장소 인터페이스: 여러 워커/서버가 폐기 목록을 공유하려면 같은 메서드를 가진 공유 저장소(DatabaseDenylist, Redis 등)로 교체
+class DenylistBackend:
+    # jti 를 토큰 만료 시각(exp, unix 초)까지 폐기
+    def revoke(self, jti, expires_at):
+        raise NotImplementedError
+
+    # user_id 의 cutoff 이전에 발급된(iat < cutoff) 토큰을 모두 폐기 (expires_at 이후에는 기록 삭제)
+    def revoke_user(self, user_id, cutoff, expires_at):
+        raise NotImplementedError
+
+    def is_revoked(self, jti, user_id, issued_at):
+        raise NotImplementedError
+
+    # 사용자 정보가 바뀌었음을 다른 워커/서버에 알림 (토큰은 폐기하지 않음, 공유 저장소가 아니면 할 일 없음)
+    def record_user_change(self, user_id, expires_at):
+        pass
+
+    # 공유 저장소 동기화 같은 백그라운드 작업 시작 (워커마다 호출됨)
+    def start_sync(self, app):
+        pass
+
+    def stats(self):
+        return {}
+
+
+# 폐기된 jti 의 블룸 필터 (비트 배열 + 해시 1회에서 나눈 k 개 위치, double hashing)
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        # 위치를 하나씩 계산하며 확인 (폐기되지 않은 토큰은 대개 첫 한두 위치에서 끝남)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits, size = self._bits, self.size
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+# 프로세스 내 폐기 목록 저장소
+# - jti -> 만료 시각 dict 앞에 블룸 필터를 두어, 폐기되지 않은 대부분의 토큰은 해시 1회로 통과
+#   (블룸 필터가 있다고 답한 경우에만 dict 로 확인하므로 오탐이 있어도 결과는 정확함)
+# - 만료된 jti 는 일정 횟수 폐기할 때마다 dict 에서 지우고 블룸 필터를 다시 만듦 (블룸 필터는 삭제 불가)
+# - 비밀번호 변경/회원 탈퇴는 사용자별 cutoff 로 그 이전에 발급된 토큰을 한꺼번에 폐기
+class MemoryDenylist(DenylistBackend):
+    def __init__(self, capacity=100000, error_rate=0.01, sweep_every=1000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._user_cutoffs = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._ops = 0
+        self.rebuilds = 0
+        self.bloom_false_positives = 0
+
+    def revoke(self, jti, expires_at, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._maybe_sweep(now)
+            if jti not in self._revoked:
+                self._bloom.add(jti)
+            self._revoked[jti] = expires_at
+
+    # 같은 사용자를 여러 번 폐기하면 더 늦은 cutoff 를 유지 (공유 저장소에서 읽은 순서와 관계없이 같은 결과)
+    def revoke_user(self, user_id, cutoff, expires_at):
+        with self._lock:
+            self._maybe_sweep(cutoff)
+            entry = self._user_cutoffs.get(user_id)
+            if entry is not None:
+                cutoff, expires_at = max(cutoff, entry[0]), max(expires_at, entry[1])
+            self._user_cutoffs[user_id] = (cutoff, expires_at)
+
+    def is_revoked(self, jti, user_id, issued_at, now=None):
+        if self._user_cutoffs:
+            entry = self._user_cutoffs.get(user_id)
+            if entry is not None and issued_at < entry[0]:
+                return True
+        if jti is None or not self._revoked or jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            self.bloom_false_positives += 1
+            return False
+        return expires_at > (time.time() if now is None else now)
+
+    def _maybe_sweep(self, now):
+        self._ops += 1
+        if self._ops % self.sweep_every == 0 or self._bloom.count >= self._bloom.capacity:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        self._user_cutoffs = {
+            user_id: entry for user_id, entry in self._user_cutoffs.items() if entry[1] > now
+        }
+        # 살아 있는 항목이 capacity 를 넘으면 필터를 키워 오탐률을 유지
+        capacity = max(self.capacity, len(self._revoked) * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+        self.rebuilds += 1
+
+    def sweep(self, now=None):
+        with self._lock:
+            self._sweep(time.time() if now is None else now)
+
+    def stats(self):
+        bloom = self._bloom
+        return {
+            'backend': 'memory',
+            'revoked': len(self._revoked),
+            'user_cutoffs': len(self._user_cutoffs),
+            'bloom_bits': bloom.size,
+            'bloom_hashes': bloom.hash_count,
+            'bloom_entries': bloom.count,
+            'rebuilds': self.rebuilds,
+            'bloom_false_positives': self.bloom_false_positives,
+        }
+
+
+# 여러 워커/서버가 공유하는 DB 테이블(token_revocations) 폐기 목록
+# - 폐기는 호출 측 세션에 행을 추가해 호출 측 트랜잭션과 함께 커밋하고, 커밋되면 이 프로세스의 메모리 목록에 바로 반영
+# - 다른 워커/서버의 폐기는 sync_interval 초마다 새로 추가된 행을 읽어 메모리 목록에 반영 (그 사이 최대 sync_interval 초 늦게 거부)
+# - 확인(is_revoked)은 메모리 목록(MemoryDenylist)만 보므로 요청마다 DB 를 조회하지 않음
+# 새 행은 created_at 으로 찾으며, 커밋 지연과 서버 간 시계 차이를 sync_margin 초만큼 겹쳐 읽어 흡수 (이미 반영한 행은 건너뜀)
+# 동기화로 읽은 행의 user_id 는 listeners(user_id 집합을 받는 함수)에 알림 (다른 워커의 사용자 캐시 무효화 등)
+class DatabaseDenylist(DenylistBackend):
+    def __init__(self, capacity=100000, error_rate=0.01, sync_interval=1.0, sync_margin=10.0, cleanup_interval=3600,
+                 listeners=None):
+        self.listeners = listeners if listeners is not None else []
+        self.sync_interval = sync_interval
+        self.sync_margin = sync_margin
+        self.cleanup_interval = cleanup_interval
+        self.session = None
+        self.model = None
+        self._syncer = DaemonLoop('token-denylist-sync')
+        self._watching = False
+        self.reset(capacity, error_rate)
+
+    # 메모리 목록과 동기화 위치 초기화 (다음 동기화에서 만료되지 않은 행을 모두 다시 읽음)
+    def reset(self, capacity=100000, error_rate=0.01):
+        self._local = MemoryDenylist(capacity, error_rate)
+        self._synced_at = None
+        self._seen = {}  # revocation_id -> created_at (겹쳐 읽는 구간의 이미 반영한 행)
+        self._next_cleanup = 0.0
+        self._failing = False
+        self.syncs = 0
+        self.sync_errors = 0
+        self.synced_rows = 0
+
+    # 폐기 기록을 쓸 세션과 모델 (revocation_id, jti, user_id, cutoff, expires_at, created_at 컬럼)
+    def watch(self, session, model):
+        self.session = session
+        self.model = model
+
+        def after_commit(commit_session):
+            for values in commit_session.info.pop('token_revocations', ()):
+                self._apply(values)
+
+        def after_soft_rollback(rollback_session, previous_transaction):
+            rollback_session.info.pop('token_revocations', None)
+
+        if self._watching:
+            return
+        event.listen(session, 'after_commit', after_commit)
+        event.listen(session, 'after_soft_rollback', after_soft_rollback)
+        self._watching = True
+
+    def revoke(self, jti, expires_at):
+        self._record({'jti': jti, 'user_id': None, 'cutoff': None, 'expires_at': expires_at})
+
+    def revoke_user(self, user_id, cutoff, expires_at):
+        self._record({'jti': None, 'user_id': user_id, 'cutoff': cutoff, 'expires_at': expires_at})
+
+    # jti 와 cutoff 가 없는 행: 폐기 없이 listeners 에만 알림
+    def record_user_change(self, user_id, expires_at):
+        self._record({'jti': None, 'user_id': user_id, 'cutoff': None, 'expires_at': expires_at})
+
+    def _record(self, values):
+        values['created_at'] = time.time()
+        self.session.add(self.model(**values))
+        self.session.info.setdefault('token_revocations', []).append(values)
+
+    def _apply(self, values):
+        if values['jti']:
+            self._local.revoke(values['jti'], values['expires_at'])
+        elif values['cutoff'] is not None:
+            self._local.revoke_user(values['user_id'], values['cutoff'], values['expires_at'])
+
+    def is_revoked(self, jti, user_id, issued_at):
+        return self._local.is_revoked(jti, user_id, issued_at)
+
+    # 마지막 동기화 이후 추가된 (만료되지 않은) 폐기 행을 메모리 목록에 반영하고, cleanup_interval 마다 만료된 행 삭제
+    def sync(self):
+        model = self.model
+        now = time.time()
+        query = self.session.query(
+            model.revocation_id, model.jti, model.user_id, model.cutoff, model.expires_at, model.created_at,
+        ).filter(model.expires_at > now)
+        if self._synced_at is not None:
+            query = query.filter(model.created_at >= self._synced_at - self.sync_margin)
+        applied = 0
+        changed_users = set()
+        for row in query.all():
+            if row.revocation_id in self._seen:
+                continue
+            self._seen[row.revocation_id] = row.created_at
+            self._apply(row._asdict())
+            if row.user_id is not None:
+                changed_users.add(row.user_id)
+            applied += 1
+        if changed_users:
+            for listener in self.listeners:
+                listener(changed_users)
+        self._synced_at = now
+        self._seen = {
+            revocation_id: created_at
+            for revocation_id, created_at in self._seen.items() if created_at >= now - self.sync_margin
+        }
+        self.syncs += 1
+        self.synced_rows += applied
+
+        if self.cleanup_interval > 0 and time.monotonic() >= self._next_cleanup:
+            self.session.query(model).filter(model.expires_at <= now).delete(synchronize_session=False)
+            self.session.commit()
+            self._next_cleanup = time.monotonic() + self.cleanup_interval
+        return applied
+
+    def start_sync(self, app):
+        def run():
+            self.sync()
+            if self._failing:
+                self._failing = False
+                logger.info('토큰 폐기 목록 동기화 복구')
+
+        def on_error(e):
+            self.session.rollback()
+            self.sync_errors += 1
+            # DB 장애 동안 sync_interval 마다 같은 오류를 남기지 않도록 연속 실패의 첫 번째만 기록
+            if not self._failing:
+                self._failing = True
+                logger.error(f'토큰 폐기 목록 동기화 중 오류 발생: {e}')
+
+        self._syncer.start(run, lambda: self.sync_interval, on_error, app=app)
+
+    def stats(self):
+        return dict(
+            self._local.stats(),
+            backend='database',
+            sync_interval=self.sync_interval,
+            synced_at=self._synced_at,
+            syncs=self.syncs,
+            sync_errors=self.sync_errors,
+            synced_rows=self.synced_rows,
+        )
+
+
+# token_required 에서 사용하는 토큰 폐기 목록
+# 로그인 토큰의 jti(토큰 ID)와 iat(발급 시각)로 로그아웃한 토큰, 비밀번호 변경/탈퇴 이전에 발급된 토큰을 거부
+class TokenDenylist:
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.listeners = []  # 공유 저장소에서 읽은 변경의 user_id 집합을 받는 함수 목록
+        self.enabled = True
+        self.checks = 0
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    # TOKEN_DENYLIST_BACKEND: database(워커/서버 공유, watch 로 세션과 모델 지정) 또는 memory(프로세스 하나일 때만)
+    def init_app(self, app):
+        self.enabled = bool(app.config.setdefault('TOKEN_DENYLIST_ENABLED', True))
+        kind = app.config.setdefault('TOKEN_DENYLIST_BACKEND', 'database')
+        capacity = int(app.config.setdefault('TOKEN_DENYLIST_CAPACITY', 100000))
+        error_rate = float(app.config.setdefault('TOKEN_DENYLIST_ERROR_RATE', 0.01))
+        sync_interval = float(app.config.setdefault('TOKEN_DENYLIST_SYNC_INTERVAL', 1.0))
+        if self.backend is not None and not isinstance(self.backend, (MemoryDenylist, DatabaseDenylist)):
+            return
+        if kind == 'database':
+            # 세션 이벤트 리스너가 한 번만 등록되도록 create_app 이 다시 호출되어도 같은 저장소를 초기화해 사용
+            if not isinstance(self.backend, DatabaseDenylist):
+                self.backend = DatabaseDenylist(listeners=self.listeners)
+            self.backend.reset(capacity, error_rate)
+            self.backend.sync_interval = sync_interval
+        elif kind == 'memory':
+            self.backend = MemoryDenylist(capacity=capacity, error_rate=error_rate)
+        else:
+            raise ValueError(f'알 수 없는 TOKEN_DENYLIST_BACKEND: {kind}')
+
+    def watch(self, session, model):
+        if isinstance(self.backend, DatabaseDenylist):
+            self.backend.watch(session, model)
+
+    def start_sync(self, app):
+        if self.enabled:
+            self.backend.start_sync(app)
+
+    # 디코딩된 토큰 claims 가 폐기되었는지 확인 (iat 가 없는 예전 토큰은 사용자 cutoff 가 있으면 폐기로 처리)
+    def is_revoked(self, claims):
+        if not self.enabled:
+            return False
+        self.checks += 1
+        if self.backend.is_revoked(claims.get('jti'), claims.get('user_id'), claims.get('iat', 0)):
+            self.rejected += 1
+            return True
+        return False
+
+    # database 저장소는 호출 측 세션에 기록하므로 호출 측이 커밋해야 반영됨 (롤백하면 폐기도 취소)
+    def revoke(self, claims):
+        if self.enabled and claims.get('jti'):
+            self.backend.revoke(claims['jti'], claims['exp'])
+
+    def revoke_user(self, user_id, token_expiration):
+        if self.enabled:
+            cutoff = time.time()
+            self.backend.revoke_user(user_id, cutoff, cutoff + token_expiration.total_seconds())
+
+    # 토큰 폐기 없이 사용자 정보 변경만 다른 워커/서버에 알림 (revoke 와 같이 호출 측이 커밋해야 반영됨)
+    # ttl: 다른 워커의 캐시 항목이 어차피 만료되는 시간이 지나면 기록이 필요 없으므로 그때까지만 보관
+    def record_user_change(self, user_id, ttl):
+        if self.enabled:
+            self.backend.record_user_change(user_id, time.time() + ttl)
+
+    def stats(self):
+        return dict(self.backend.stats(), enabled=self.enabled, checks=self.checks, rejected=self.rejected)
@@ -37,10 +37,21 @@ CREATE TABLE IF NOT EXISTS user_interests (
     user_interest_id BIGINT AUTO_INCREMENT PRIMARY KEY,
     user_id BIGINT NOT NULL,
     interests_id BIGINT NOT NULL,
+    UNIQUE KEY uq_user_interests_user_interest (user_id, interests_id),  -- 중복 방지 및 사용자별 조회 인덱스
     FOREIGN KEY (user_id) REFERENCES user(user_id),
     FOREIGN KEY (interests_id) REFERENCES interests(interests_id)
 );
 
+-- interest_popularity 요약 테이블 생성 (관심분야/성별/출생 연도별 사용자 수, 앱에서 증감 유지)
+CREATE TABLE IF NOT EXISTS interest_popularity (
+    interests_id BIGINT NOT NULL,
+    gender ENUM('male', 'female') NOT NULL,
+    birth_year SMALLINT NOT NULL,
+    user_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (interests_id, gender, birth_year),
+    FOREIGN KEY (interests_id) REFERENCES interests(interests_id) ON DELETE CASCADE
+);
+
 -- supplements 테이블 생성
 CREATE TABLE IF NOT EXISTS supplements (
     supplements_id BIGINT AUTO_INCREMENT PRIMARY KEY,
@@ -58,3 +69,16 @@ CREATE TABLE IF NOT EXISTS supplement_interests (
     FOREIGN KEY (interests_id) REFERENCES interests(interests_id) ON DELETE CASCADE
 );
 
+
+-- token_revocations 테이블 생성 (로그아웃/비밀번호 변경/탈퇴로 폐기된 토큰 기록, 모든 워커가 주기적으로 읽어 반영)
+-- jti 가 있으면 그 토큰만, 없으면 user_id 의 cutoff 이전에 발급된 토큰 전체. expires_at 이 지나면 앱이 삭제
+CREATE TABLE IF NOT EXISTS token_revocations (
+    revocation_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    jti VARCHAR(32),
+    user_id BIGINT,
+    cutoff DOUBLE,
+    expires_at DOUBLE NOT NULL,
+    created_at DOUBLE NOT NULL,
+    INDEX ix_token_revocations_expires_at (expires_at),
+    INDEX ix_token_revocations_created_at (created_at)
+);